@@ -0,0 +1,189 @@
+"""Benchmark parse_pdf stage by stage on a synthetic corpus.
+
+Each corpus kind (see make_corpus.py) is parsed in a fresh process so its peak
+RSS is measured on its own. Stage timings come from ``parse_pdf(stats=True)``;
+the median over ``--repeat`` runs is reported along with pages/sec. Vision uses
+an offline stub client, so nothing leaves the machine.
+
+    python scripts/bench_parse.py --pages 100 --out bench.json
+    python scripts/bench_parse.py --pages 100 --save-baseline scripts/bench_baseline.json
+    python scripts/bench_parse.py --pages 100 --baseline scripts/bench_baseline.json
+
+With ``--baseline`` each case is compared with the stored result and the exit
+code is 1 if wall time or peak RSS grew by more than ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List
+
+from make_corpus import KINDS, make
+
+COMPARED = ("wall_s", "peak_rss_mb")
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+
+
+class _Response:
+    def __init__(self, content: str, usage: _Usage):
+        self.choices = [_Choice(content)]
+        self.usage = usage
+
+
+class StubVisionClient:
+    """Offline stand-in for the OpenAI client: echoes each window back unchanged."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature=None):
+        payload = messages[-1]["content"]
+        prompt = sum(len(m["content"]) for m in messages) // 4
+        return _Response(payload, _Usage(prompt, len(payload) // 4))
+
+
+def tesseract_available() -> bool:
+    import pytesseract
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+
+def peak_rss_mb() -> float:
+    import resource
+    # ru_maxrss is KiB on Linux and bytes on macOS; workers count as children
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / (1 << 20)
+
+
+def run_case(path: str, options: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    # Runs in a fresh process per case
+    from pdfparser import parse_pdf
+    from pdfparser import vision
+
+    runs = []
+    for _ in range(repeat):
+        # Start every run with an empty vision reply cache so the stub is actually called
+        vision.default_cache.backend = vision.MemoryBackend()
+        with tempfile.TemporaryDirectory() as images_dir:
+            t0 = time.perf_counter()
+            result = parse_pdf(path, images_dir=images_dir, vision_client=StubVisionClient(), stats=True, **options)
+            runs.append((time.perf_counter() - t0, result["stats"], result["meta"]["pages"]))
+
+    walls = [w for w, _, _ in runs]
+    stages: Dict[str, Dict[str, float]] = {}
+    for name in runs[0][1]["stages"]:
+        stages[name] = {k: statistics.median(r["stages"][name][k] for _, r, _ in runs) for k in ("wall_s", "cpu_s")}
+    pages = runs[0][2]
+    wall = statistics.median(walls)
+    return {
+        "pages": pages,
+        "wall_s": wall,
+        "pages_per_s": pages / wall if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+        "counters": runs[-1][1]["counters"],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Per-case ratios against ``baseline``; entries over ``1 + tolerance`` are flagged."""
+    rows = []
+    for name, case in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or "skipped" in case or "skipped" in base:
+            continue
+        for metric in COMPARED:
+            if not base.get(metric):
+                continue
+            ratio = case[metric] / base[metric]
+            rows.append({"case": name, "metric": metric, "baseline": base[metric], "current": case[metric], "ratio": ratio, "regression": ratio > 1 + tolerance})
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--kinds", nargs="+", choices=sorted(KINDS), default=sorted(KINDS))
+    p.add_argument("--pages", type=int, default=50, help="Pages per corpus document")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--ocr-workers", type=int, default=1)
+    p.add_argument("--no-vision", action="store_true", help="Skip the (stubbed) vision stage")
+    p.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "pdfparser-bench-corpus"))
+    p.add_argument("--out", help="Write results JSON here; default stdout")
+    p.add_argument("--baseline", help="Compare with a results JSON written earlier")
+    p.add_argument("--save-baseline", help="Also write the results to this baseline path")
+    p.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative growth before a regression is reported (default 0.2)")
+    args = p.parse_args()
+
+    config = {"pages": args.pages, "repeat": args.repeat, "workers": args.workers, "ocr_workers": args.ocr_workers, "vision": not args.no_vision}
+    options = dict(ocr_mode="if-needed", workers=args.workers, ocr_workers=args.ocr_workers, use_vision=not args.no_vision)
+    results: Dict[str, Any] = {
+        "config": config,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "cases": {},
+    }
+
+    ctx = get_context("spawn")
+    print(f"{'case':<8} {'pages':>6} {'wall s':>8} {'pages/s':>8} {'rss MB':>8}  stages", file=sys.stderr)
+    for kind in args.kinds:
+        if kind == "scanned" and not tesseract_available():
+            results["cases"][kind] = {"skipped": "tesseract not found"}
+            print(f"{kind:<8} skipped: tesseract not found", file=sys.stderr)
+            continue
+        path = make(kind, args.pages, args.corpus_dir)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            case = pool.submit(run_case, path, options, args.repeat).result()
+        results["cases"][kind] = case
+        stages = " ".join(f"{k}={v['wall_s']:.2f}" for k, v in case["stages"].items())
+        print(f"{kind:<8} {case['pages']:>6} {case['wall_s']:>8.2f} {case['pages_per_s']:>8.1f} {case['peak_rss_mb']:>8.1f}  {stages}", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"warning: baseline config {baseline.get('config')} differs from {config}", file=sys.stderr)
+        rows = compare(results, baseline, args.tolerance)
+        results["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "rows": rows}
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<8} {row['metric']:<12} {row['baseline']:>9.2f} -> {row['current']:>9.2f} ({row['ratio']:.2f}x){flag}", file=sys.stderr)
+        status = 1 if any(r["regression"] for r in rows) else 0
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
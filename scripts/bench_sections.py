@@ -0,0 +1,119 @@
+"""Benchmark section building on synthetic documents with large ToCs.
+
+Compares pdfparser.structure.build_sections with the previous quadratic
+implementation (kept below as a reference) and checks both give the same tree.
+
+    python scripts/bench_sections.py --toc 3000 --pages 2000 --blocks 50
+"""
+import argparse
+import copy
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from pdfparser.structure import build_sections, new_section
+
+
+def synthetic(toc_size: int, pages: int, blocks: int, seed: int = 0):
+    rnd = random.Random(seed)
+    structured = [
+        {
+            "number": n,
+            "width": 612,
+            "height": 792,
+            "blocks": [{"type": "paragraph", "text": f"p{n}.{k}", "bbox": [0, 0, 1, 1]} for k in range(blocks)],
+            "images": [],
+            "links": [],
+        }
+        for n in range(1, pages + 1)
+    ]
+    starts = sorted(rnd.randint(1, pages) for _ in range(toc_size))
+    level = 1
+    toc = []
+    for k, page in enumerate(starts):
+        level = max(1, min(level + rnd.choice([-1, 0, 0, 1]), 6))
+        toc.append({"level": level, "title": f"Section {k}", "page": page})
+    return structured, toc
+
+
+def reference_build_sections(structured_pages: List[Dict[str, Any]], toc: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # The pre-index implementation: rescans the tree for every item and the
+    # sorted node list for every page_end.
+    sections: List[Dict[str, Any]] = []
+    stack: List[Dict[str, Any]] = []
+    for item in toc:
+        level = int(item.get("level") or 1)
+        node = new_section(item.get("title") or "", level, int(item.get("page") or 1))
+        while stack and stack[-1]["level"] >= level:
+            stack.pop()
+        (stack[-1]["children"] if stack else sections).append(node)
+        stack.append(node)
+
+    flat: List[Dict[str, Any]] = []
+
+    def walk(n):
+        flat.append(n)
+        for c in n["children"]:
+            walk(c)
+
+    for root in sections:
+        walk(root)
+    flat_sorted = sorted(flat, key=lambda n: (n["page_start"], n["level"]))
+    for i, n in enumerate(flat_sorted):
+        end_page = structured_pages[-1]["number"] if structured_pages else n["page_start"]
+        for m in flat_sorted[i + 1:]:
+            if m["level"] <= n["level"]:
+                end_page = m["page_start"] - 1
+                break
+        n["page_end"] = max(n["page_start"], end_page)
+
+    def place(page_num, kind, item):
+        def place_in(nodes):
+            for node in nodes[::-1]:
+                if node["page_start"] <= page_num <= (node["page_end"] or page_num):
+                    if node["children"] and place_in(node["children"]):
+                        return True
+                    node[kind].append(item)
+                    return True
+            return False
+        place_in(sections)
+
+    for page in structured_pages:
+        for blk in page.get("blocks", []):
+            place(page["number"], "blocks", {"page": page["number"], "block": blk})
+        for img in page.get("images", []):
+            place(page["number"], "images", img)
+        for lnk in page.get("links", []):
+            place(page["number"], "links", lnk)
+    return sections
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--toc", type=int, nargs="+", default=[100, 1000, 3000], help="ToC sizes to try")
+    p.add_argument("--pages", type=int, default=2000)
+    p.add_argument("--blocks", type=int, default=50, help="Blocks per page")
+    p.add_argument("--skip-reference", action="store_true", help="Only time the current implementation")
+    args = p.parse_args()
+
+    print(f"{'toc':>6} {'pages':>6} {'blocks':>8} {'current s':>10} {'reference s':>12} {'speedup':>8}")
+    for toc_size in args.toc:
+        pages, toc = synthetic(toc_size, args.pages, args.blocks)
+        got, t_new = timed(build_sections, copy.deepcopy(pages), toc)
+        if args.skip_reference:
+            print(f"{toc_size:>6} {args.pages:>6} {args.pages * args.blocks:>8} {t_new:>10.3f}")
+            continue
+        ref, t_ref = timed(reference_build_sections, copy.deepcopy(pages), toc)
+        assert json.dumps(got) == json.dumps(ref), "section trees differ"
+        print(f"{toc_size:>6} {args.pages:>6} {args.pages * args.blocks:>8} {t_new:>10.3f} {t_ref:>12.3f} {t_ref / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Generate a deterministic synthetic PDF corpus for benchmarking.
+
+Each kind stresses one part of the pipeline:
+
+    text     text-dense pages with headings (extraction, structuring)
+    images   many distinct PNG/JPEG images per page (image registry, encoding)
+    scanned  rasterized pages with no text layer (OCR)
+    toc      a deep, large table of contents (section building)
+    links    thousands of URI and intra-document links
+
+    python scripts/make_corpus.py --out corpus --pages 200
+"""
+import argparse
+import io
+import os
+import random
+from typing import Callable, Dict, List
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore magna aliqua".split()
+
+
+def _sentence(rnd: random.Random, n: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _text_page(doc, rnd: random.Random, number: int, lines: int = 55):
+    p = doc.new_page()
+    p.insert_text((72, 60), f"Heading {number}", fontsize=18, fontname="hebo")
+    y = 90
+    for k in range(lines):
+        if k and k % 15 == 0:
+            p.insert_text((72, y + 4), f"Subheading {number}.{k // 15}", fontsize=13, fontname="hebo")
+            y += 18
+        p.insert_text((72, y), _sentence(rnd, 12), fontsize=9)
+        y += 11.5
+    return p
+
+
+def _image_bytes(rnd: random.Random, size: int, fmt: str) -> bytes:
+    img = Image.new("RGB", (size, size), tuple(rnd.randrange(256) for _ in range(3)))
+    # A little noise so images don't compress to nothing and every one is distinct
+    px = img.load()
+    for _ in range(size * 4):
+        px[rnd.randrange(size), rnd.randrange(size)] = tuple(rnd.randrange(256) for _ in range(3))
+    buf = io.BytesIO()
+    img.save(buf, fmt)
+    return buf.getvalue()
+
+
+def text_dense(pages: int, rnd: random.Random):
+    doc = fitz.open()
+    toc = []
+    for n in range(1, pages + 1):
+        _text_page(doc, rnd, n)
+        toc.append([1, f"Heading {n}", n])
+    doc.set_toc(toc)
+    return doc
+
+
+def image_heavy(pages: int, rnd: random.Random, per_page: int = 12):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        p = doc.new_page()
+        p.insert_text((72, 60), f"Figures {n}", fontsize=18, fontname="hebo")
+        for k in range(per_page):
+            x, y = 60 + (k % 4) * 130, 90 + (k // 4) * 150
+            data = _image_bytes(rnd, 96, "JPEG" if k % 2 else "PNG")
+            p.insert_image(fitz.Rect(x, y, x + 120, y + 120), stream=data)
+            p.insert_text((x, y + 135), f"Figure {n}.{k}", fontsize=8)
+    return doc
+
+
+def scanned(pages: int, rnd: random.Random, dpi: int = 150):
+    src = text_dense(pages, rnd)
+    doc = fitz.open()
+    for page in src:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        out = doc.new_page(width=page.rect.width, height=page.rect.height)
+        out.insert_image(out.rect, stream=pix.tobytes("png"))
+    src.close()
+    return doc
+
+
+def deep_toc(pages: int, rnd: random.Random, entries_per_page: int = 8, depth: int = 6):
+    doc = fitz.open()
+    toc = []
+    level = 1
+    for n in range(1, pages + 1):
+        p = doc.new_page()
+        y = 60
+        for k in range(entries_per_page):
+            # PyMuPDF wants the first entry at level 1 and at most one level deeper per step
+            level = max(1, min(level + rnd.choice([-1, 0, 1, 1]), depth)) if toc else 1
+            title = f"Section {n}.{k}"
+            toc.append([level, title, n])
+            p.insert_text((72, y), title, fontsize=20 - 2 * level, fontname="hebo")
+            p.insert_text((72, y + 16), _sentence(rnd, 10), fontsize=9)
+            y += 40
+    doc.set_toc(toc)
+    return doc
+
+
+def many_links(pages: int, rnd: random.Random, per_page: int = 100):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    for n, p in enumerate(doc):
+        for k in range(per_page):
+            x, y = 40 + (k % 5) * 110, 40 + (k // 5) * 36
+            r = fitz.Rect(x, y, x + 100, y + 12)
+            p.insert_text((x, y + 10), f"ref {n + 1}.{k}", fontsize=8)
+            if k % 2:
+                p.insert_link({"kind": fitz.LINK_URI, "from": r, "uri": f"https://example.com/{n}/{k}"})
+            else:
+                p.insert_link({"kind": fitz.LINK_GOTO, "from": r, "page": rnd.randrange(pages)})
+    return doc
+
+
+KINDS: Dict[str, Callable] = {
+    "text": text_dense,
+    "images": image_heavy,
+    "scanned": scanned,
+    "toc": deep_toc,
+    "links": many_links,
+}
+
+
+def make(kind: str, pages: int, out_dir: str, seed: int = 0) -> str:
+    """Write ``<kind>-<pages>-s<seed>.pdf`` into ``out_dir`` unless it already exists; returns its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{kind}-{pages}-s{seed}.pdf")
+    if not os.path.exists(path):
+        doc = KINDS[kind](pages, random.Random(seed))
+        doc.set_metadata({"title": f"Synthetic {kind} corpus", "author": "bench"})
+        tmp = path + ".tmp"
+        doc.save(tmp, garbage=3, deflate=True)
+        doc.close()
+        os.replace(tmp, path)
+    return path
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--out", default="corpus", help="Output directory")
+    p.add_argument("--kinds", nargs="+", choices=sorted(KINDS), default=sorted(KINDS))
+    p.add_argument("--pages", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    paths: List[str] = [make(k, args.pages, args.out, seed=args.seed) for k in args.kinds]
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
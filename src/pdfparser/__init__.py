@@ -1,3 +1,4 @@
-from .api import parse_pdf
+from .aio import AsyncLimits, parse_pdf_async
+from .api import iter_parse_pdf, parse_pdf, reparse_pdf
 
-__all__ = ["parse_pdf"]
+__all__ = ["parse_pdf", "iter_parse_pdf", "reparse_pdf", "parse_pdf_async", "AsyncLimits"]
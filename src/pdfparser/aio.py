@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import contextlib
+import io
+import os
+
+from PIL import Image
+import pytesseract
+
+from .extract import ImageRegistry, _extract_chunk, check_profile, chunk_indices, document_meta, select_pages
+from .ocr import CliBackend, OcrBackend, OcrBackendSpec, PytesseractBackend, encode_image, get_backend, ocr_blocks, ocr_decision, ocr_inputs, parse_tsv, with_ocr_blocks
+from .session import DocumentSession
+from .source import PdfInput, PdfSource, SharedPdf
+from .structure import build_structure
+from .vision import VisionCache, default_cache, refine_with_vision_async
+
+
+class AsyncLimits:
+    """Executors and per-stage concurrency limits shared by ``parse_pdf_async`` calls.
+
+    PyMuPDF work (page selection, extraction chunks, OCR renders) runs in one
+    process pool of ``processes`` workers, with at most ``cpu`` tasks queued or
+    running; ``ocr`` caps tesseract runs and ``vision`` caps model
+    requests in flight, across all documents using these limits. Documents
+    waiting for a slot wait in the event loop and hold no thread.
+    """
+
+    def __init__(self, processes: Optional[int] = None, cpu: Optional[int] = None, ocr: Optional[int] = None, vision: int = 8):
+        n = os.cpu_count() or 1
+        self.processes = processes or n
+        self.limits = {"cpu": cpu or self.processes, "ocr": ocr or n, "vision": vision}
+        self._loop = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+    def semaphore(self, stage: str) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; make new ones if the loop changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {k: asyncio.Semaphore(v) for k, v in self.limits.items()}
+        return self._semaphores[stage]
+
+    async def run_cpu(self, fn, *args):
+        if self._procs is None:
+            # Workers share this process's resource tracker, which sees the shared memory we unlink
+            resource_tracker.ensure_running()
+            self._procs = ProcessPoolExecutor(max_workers=self.processes)
+        async with self.semaphore("cpu"):
+            return await asyncio.get_running_loop().run_in_executor(self._procs, fn, *args)
+
+    async def start(self) -> None:
+        """Start the worker processes now instead of on the first ``run_cpu``."""
+        await self.run_cpu(os.getpid)
+
+    async def run_thread(self, fn, *args):
+        # Stages that don't touch PyMuPDF: structuring and in-process OCR engines
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.processes)
+        return await asyncio.get_running_loop().run_in_executor(self._threads, fn, *args)
+
+    def close(self) -> None:
+        for pool in (self._procs, self._threads):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._procs = self._threads = None
+
+
+_default_limits: Optional[AsyncLimits] = None
+
+
+def default_limits() -> AsyncLimits:
+    global _default_limits
+    if _default_limits is None:
+        _default_limits = AsyncLimits()
+    return _default_limits
+
+
+# Worker-process side: documents stay open between tasks for the same file version
+_sessions: "OrderedDict[Hashable, DocumentSession]" = OrderedDict()
+
+
+@contextlib.contextmanager
+def _session(ref: Union[str, SharedPdf]) -> Iterator[DocumentSession]:
+    if isinstance(ref, SharedPdf):
+        # A segment only lives for one parse; keeping it mapped here would hold the whole PDF after that
+        with DocumentSession(ref) as session:
+            yield session
+        return
+    st = os.stat(ref)
+    key = (ref, st.st_mtime_ns, st.st_size)
+    session = _sessions.get(key)
+    if session is None:
+        session = _sessions[key] = DocumentSession(ref)
+        if len(_sessions) > 4:
+            _sessions.popitem(last=False)[1].close()
+    _sessions.move_to_end(key)
+    yield session
+
+
+def _scan(path: Union[str, SharedPdf], max_pages: Optional[int], page_range: Optional[str], images_dir: Optional[str], image_format: str, image_dedupe: str, profile: str) -> Tuple[List[int], ImageRegistry]:
+    with _session(path) as session:
+        idxs = select_pages(session, max_pages=max_pages, page_range=page_range)
+        registry = ImageRegistry(images_dir, image_format=image_format, dedupe=image_dedupe)
+        return idxs, registry.scan(session.doc, idxs) if profile == "full" else registry
+
+
+def _meta(path: Union[str, SharedPdf], first: Optional[Dict[str, Any]], page_count: int) -> Dict[str, Any]:
+    with _session(path) as session:
+        return document_meta(session.doc, first, page_count)
+
+
+def _render(path: Union[str, SharedPdf], page: Dict[str, Any], color: str, regions: bool) -> Tuple[List[Tuple[bytes, float, Tuple[float, float]]], Dict[str, Any]]:
+    # PNM images for tesseract's stdin, and the page's OCR decision (ocr_inputs adds the region count)
+    with _session(path) as session:
+        inputs = ocr_inputs(session, page, page["ocr"]["dpi"], color=color, regions=regions)
+        return [(encode_image(img), scale, origin) for img, scale, origin in inputs], page["ocr"]
+
+
+async def gather_all(*aws):
+    """``asyncio.gather`` that cancels the remaining tasks when one fails."""
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        raise
+
+
+async def tesseract_data(image: bytes) -> Dict[str, List[Any]]:
+    """Run tesseract as an async subprocess on an encoded image; killed if the caller is cancelled."""
+    env = dict(os.environ)
+    env.setdefault("OMP_THREAD_LIMIT", "1")
+    proc = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "tsv",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env,
+    )
+    try:
+        out, err = await proc.communicate(image)
+    except BaseException:
+        if proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(f"tesseract exited with {proc.returncode}: {err.decode('utf-8', 'replace').strip()}")
+    return parse_tsv(out.decode("utf-8", "replace"))
+
+
+def _image_data(backend: OcrBackend, image: bytes) -> Dict[str, List[Any]]:
+    return backend.image_to_data(Image.open(io.BytesIO(image)))
+
+
+async def parse_pdf_async(
+    path: PdfInput,
+    images_dir: Optional[str] = None,
+    ocr_mode: str = "if-needed",
+    ocr_dpi: int = 300,
+    use_vision: bool = False,
+    vision_model: str = "gpt-4o-mini",
+    max_pages: Optional[int] = None,
+    page_range: Optional[str] = None,
+    verbose: bool = False,
+    image_format: str = "png",
+    image_dedupe: str = "xref",
+    ocr_color: str = "gray",
+    ocr_adaptive_dpi: bool = True,
+    ocr_regions: bool = False,
+    section_refs: bool = False,
+    vision_client: Any = None,
+    vision_cache_ttl: Optional[float] = None,
+    timeout: Optional[float] = None,
+    limits: Optional[AsyncLimits] = None,
+    profile: str = "full",
+    ocr_backend: OcrBackendSpec = "auto",
+) -> Dict[str, Any]:
+    """Async ``parse_pdf``: same options and output, without blocking the event loop.
+
+    PyMuPDF stages run in the shared process pool of ``limits`` (default: one
+    per process, sized to the CPU count). Tesseract runs as async subprocesses,
+    or in threads when ``ocr_backend`` resolves to an in-process engine such as
+    tesserocr (the default when installed); vision uses an async client (default ``make_async_client``; any object
+    with an awaitable ``chat.completions.create``). Cancelling the task, or
+    exceeding ``timeout`` seconds (``asyncio.TimeoutError``), stops pending work
+    and kills running tesseract processes (in-process engines finish the image
+    they are on). ``path`` takes the same inputs as
+    ``parse_pdf``; in-memory data is copied once into shared memory for the
+    worker processes.
+    """
+    coro = _parse_source(path, limits or default_limits(), images_dir, ocr_mode, ocr_dpi, use_vision, vision_model, max_pages, page_range, verbose, image_format, image_dedupe, ocr_color, ocr_adaptive_dpi, ocr_regions, section_refs, vision_client, vision_cache_ttl, check_profile(profile), get_backend(ocr_backend))
+    if timeout is None:
+        return await coro
+    return await asyncio.wait_for(coro, timeout)
+
+
+async def _parse_source(path: PdfInput, limits: AsyncLimits, *args) -> Dict[str, Any]:
+    source = PdfSource(path)
+    try:
+        if source.path is None:
+            # Workers forked while the segment exists would keep it mapped for as long as they live
+            await limits.start()
+        with source.shared() as ref:
+            return await _parse(ref, *args, limits)
+    finally:
+        source.close()
+
+
+async def _parse(path, images_dir, ocr_mode, ocr_dpi, use_vision, vision_model, max_pages, page_range, verbose, image_format, image_dedupe, ocr_color, ocr_adaptive_dpi, ocr_regions, section_refs, vision_client, vision_cache_ttl, profile, backend: OcrBackend, limits: AsyncLimits) -> Dict[str, Any]:
+    if images_dir:
+        os.makedirs(images_dir, exist_ok=True)
+
+    idxs, registry = await limits.run_cpu(_scan, path, max_pages, page_range, images_dir, image_format, image_dedupe, profile)
+    chunks = chunk_indices(idxs, limits.processes)
+    if verbose:
+        print(f"Extracting {len(idxs)} pages in {len(chunks)} chunks")
+    results = await gather_all(*(limits.run_cpu(_extract_chunk, path, c, registry, profile) for c in chunks))
+    pages = [page for chunk in results for page, _, _ in chunk]
+    meta = await limits.run_cpu(_meta, path, pages[0] if pages else None, len(pages))
+
+    if ocr_mode in {"if-needed", "always"}:
+        # Backends that start a tesseract process per image get a killable async one instead
+        subprocesses = isinstance(backend, (CliBackend, PytesseractBackend))
+        # Bounds rendered images held per document while tesseract catches up
+        window = asyncio.Semaphore(2 * limits.limits["ocr"])
+
+        async def ocr_one(page: Dict[str, Any]) -> Dict[str, Any]:
+            decision = ocr_decision(page, ocr_mode, ocr_dpi, ocr_adaptive_dpi)
+            page = {**page, "ocr": decision}
+            if not decision["needed"]:
+                return page
+            async with window:
+                inputs, decision = await limits.run_cpu(_render, path, page, ocr_color, ocr_regions)
+                blocks = []
+                for image, scale, origin in inputs:
+                    async with limits.semaphore("ocr"):
+                        data = await tesseract_data(image) if subprocesses else await limits.run_thread(_image_data, backend, image)
+                    blocks.extend(ocr_blocks(data, scale, origin))
+            if verbose:
+                print(f"OCR page {page['number']}: {sum(len(b.text) for b in blocks)} chars in {len(blocks)} blocks at {decision.get('dpi')} DPI")
+            return with_ocr_blocks({**page, "ocr": decision}, blocks)
+
+        pages = list(await gather_all(*(ocr_one(p) for p in pages)))
+
+    structured = await limits.run_thread(build_structure, pages, verbose, meta, section_refs)
+
+    if use_vision:
+        try:
+            structured = await refine_with_vision_async(structured, model=vision_model, verbose=verbose, client=vision_client, section_refs=section_refs, cache=VisionCache(default_cache.backend, ttl=vision_cache_ttl), limit=limits.semaphore("vision"))
+        except Exception as e:
+            if verbose:
+                print(f"Vision refinement failed: {e}")
+    return structured
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import contextlib
 import json
 import os
 
-from .extract import extract_pages
-from .ocr import ocr_pages_if_needed
-from .structure import build_structure
-from .vision import refine_with_vision
+from .cache import ParseCache, json_digest
+from .extract import ImageRegistry, document_meta, extract_pages, iter_pages, select_pages
+from .fingerprint import page_fingerprints
+from .fonts import FontStats, document_fonts, page_fonts
+from .model import compact_page, pages_to_dicts
+from .ocr import OcrBackendSpec, iter_ocr_pages, ocr_pages_if_needed
+from .session import DocumentSession
+from .source import PdfInput
+from .stats import ParseStats, StatsHook
+from .structure import build_meta, build_sections, build_structure, structure_page
+from .vision import DiskBackend, VisionCache, default_cache, refine_with_vision
 
 
 @dataclass
@@ -21,10 +29,34 @@ class ParseOptions:
     max_pages: Optional[int] = None
     page_range: Optional[str] = None
     verbose: bool = False
+    workers: int = 1
+    image_format: str = "png"  # "png" | "native"
+    image_dedupe: str = "xref"  # "xref" | "content"
+    ocr_workers: int = 1
+    ocr_color: str = "gray"  # "rgb" | "gray" | "mono"
+    ocr_adaptive_dpi: bool = True
+    ocr_regions: bool = False
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 1 << 30
+    section_refs: bool = False
+    vision_cache_ttl: Optional[float] = None
+    stats: bool = False
+    fingerprints: bool = False
+    profile: str = "full"  # "text" | "layout" | "full"
+
+
+# ParseOptions fields that change the raw extraction result (workers does not)
+EXTRACT_CACHE_FIELDS = ("images_dir", "max_pages", "page_range", "image_format", "image_dedupe", "profile")
+# ParseOptions fields that change structured pages; reparse_pdf only reuses pages parsed with the same values
+FINGERPRINT_FIELDS = EXTRACT_CACHE_FIELDS + ("ocr_mode", "ocr_dpi", "ocr_color", "ocr_adaptive_dpi", "ocr_regions", "use_vision", "vision_model", "section_refs")
+
+
+def options_digest(options: ParseOptions) -> str:
+    return json_digest({f: getattr(options, f) for f in FINGERPRINT_FIELDS})
 
 
 def parse_pdf(
-    path: str,
+    path: PdfInput,
     images_dir: Optional[str] = None,
     ocr_mode: str = "if-needed",
     ocr_dpi: int = 300,
@@ -33,9 +65,59 @@ def parse_pdf(
     max_pages: Optional[int] = None,
     page_range: Optional[str] = None,
     verbose: bool = False,
+    workers: int = 1,
+    image_format: str = "png",
+    image_dedupe: str = "xref",
+    ocr_workers: int = 1,
+    ocr_color: str = "gray",
+    ocr_adaptive_dpi: bool = True,
+    ocr_regions: bool = False,
+    ocr_backend: OcrBackendSpec = "auto",
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = 1 << 30,
+    section_refs: bool = False,
+    vision_client: Any = None,
+    vision_cache_ttl: Optional[float] = None,
+    stats: bool = False,
+    stats_hook: Optional[StatsHook] = None,
+    fingerprints: bool = False,
+    profile: str = "full",
 ) -> Dict[str, Any]:
     """Parse a PDF into structured content.
 
+    ``path`` is a file path, or the PDF itself as bytes, a memoryview, an mmap or
+    a file object; in-memory data is passed to PyMuPDF without copying and real
+    files behind file objects are memory-mapped (see ``source.PdfSource``).
+    ``workers`` > 1 extracts pages in a process pool; output is identical to the serial path.
+    Image pixels are only decoded when ``images_dir`` is set; ``image_format="native"``
+    writes embedded JPEG/JPX streams as-is instead of re-encoding them to PNG.
+    Each unique image is saved once and referenced from every page by its ``id``;
+    ``image_dedupe="content"`` also merges identical images stored under different xrefs.
+    ``ocr_workers`` > 1 runs that many tesseract processes concurrently.
+    OCR pages are rendered in ``ocr_color`` ("rgb", "gray" or "mono"); with
+    ``ocr_adaptive_dpi`` each page gets its own DPI, at most ``ocr_dpi``, from its
+    size, scan resolution or glyph size. ``ocr_regions`` OCRs only the image areas
+    of pages that already have a text layer. ``ocr_backend`` is "auto" (tesserocr,
+    which keeps tesseract loaded in-process, when installed; else pytesseract),
+    "tesserocr", "cli" (a tesseract process fed through stdin), "pytesseract" or
+    an ``ocr.OcrBackend`` instance.
+    With ``cache_dir`` the raw extraction, per-page OCR and vision output are cached
+    on disk, each keyed by the file digest and the options that affect that stage.
+    ``section_refs`` makes sections point at page items by ``{"page", "index"}``
+    instead of embedding copies. ``vision_client`` replaces the default OpenAI client
+    for vision refinement (any object with ``chat.completions.create``). Vision
+    replies are cached per page window, on disk under ``cache_dir`` when set and in
+    memory otherwise; ``vision_cache_ttl`` (seconds) expires old entries.
+    ``stats`` adds a ``stats`` section with per-stage and per-page wall/CPU timings
+    and counters (images written, OCR pages, vision calls and tokens);
+    ``stats_hook`` is called with each measurement as it is taken.
+    ``fingerprints`` adds per-page content digests so the result can later be
+    updated with ``reparse_pdf``.
+    ``profile`` selects how much extraction collects: "full" (default) keeps
+    span details, images and links; "layout" keeps span details only; "text"
+    keeps block text with span sizes and flags, which is enough for headings
+    and paragraphs. Without images, OCR decisions only see the text layer.
+
     Returns a dict with keys: meta, pages (each page has blocks and images).
     """
     options = ParseOptions(
@@ -47,23 +129,328 @@ def parse_pdf(
         max_pages=max_pages,
         page_range=page_range,
         verbose=verbose,
+        workers=workers,
+        image_format=image_format,
+        image_dedupe=image_dedupe,
+        ocr_workers=ocr_workers,
+        ocr_color=ocr_color,
+        ocr_adaptive_dpi=ocr_adaptive_dpi,
+        ocr_regions=ocr_regions,
+        cache_dir=cache_dir,
+        cache_max_bytes=cache_max_bytes,
+        section_refs=section_refs,
+        vision_cache_ttl=vision_cache_ttl,
+        stats=stats,
+        fingerprints=fingerprints,
+        profile=profile,
     )
 
     if images_dir:
         os.makedirs(images_dir, exist_ok=True)
 
-    pages, meta = extract_pages(path, images_dir=images_dir, max_pages=max_pages, page_range=page_range, verbose=verbose)
+    cache = ParseCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    collector = ParseStats(stats_hook) if stats or stats_hook else None
 
-    if ocr_mode in {"if-needed", "always"}:
-        pages = ocr_pages_if_needed(path, pages, mode=ocr_mode, dpi=ocr_dpi, verbose=verbose)
+    def stage(name: str):
+        return collector.stage(name) if collector is not None else contextlib.nullcontext()
 
-    structured = build_structure(pages, verbose=verbose, meta=meta)
+    # One open document shared by extraction and OCR, closed before structuring
+    with DocumentSession(path) as session:
+        with stage("extract"):
+            extracted = None
+            if cache is not None:
+                extract_key = cache.key("extract", session.digest, **{f: getattr(options, f) for f in EXTRACT_CACHE_FIELDS})
+                extracted = cache.get(extract_key)
+                # Saved image files are part of the result; re-extract if any went missing
+                if extracted is not None and not all(os.path.exists(img["path"]) for p in extracted[0] for img in p.get("images", []) if img.get("path")):
+                    extracted = None
+            if extracted is None:
+                pages, meta = extract_pages(path, images_dir=images_dir, max_pages=max_pages, page_range=page_range, verbose=verbose, workers=workers, image_format=image_format, image_dedupe=image_dedupe, session=session, compact=True, stats=collector, profile=profile)
+                if cache is not None:
+                    cache.put(extract_key, [pages_to_dicts(pages), meta])
+            else:
+                pages, meta = [compact_page(p) for p in extracted[0]], extracted[1]
+
+        if fingerprints:
+            with stage("fingerprint"):
+                page_digests = page_fingerprints(session.doc, select_pages(session, max_pages=max_pages, page_range=page_range))
+
+        if ocr_mode in {"if-needed", "always"}:
+            with stage("ocr"):
+                pages = ocr_pages_if_needed(path, pages, mode=ocr_mode, dpi=ocr_dpi, verbose=verbose, workers=ocr_workers, session=session, cache=cache, compact=True, stats=collector, color=ocr_color, adaptive_dpi=ocr_adaptive_dpi, regions=ocr_regions, backend=ocr_backend)
+
+    with stage("structure"):
+        structured = build_structure(pages, verbose=verbose, meta=meta, section_refs=section_refs)
 
     if use_vision:
-        try:
-            structured = refine_with_vision(structured, model=vision_model, verbose=verbose)
-        except Exception as e:
-            if verbose:
-                print(f"Vision refinement failed: {e}")
+        with stage("vision"):
+            vision_key = cache.key("vision", session.digest, model=vision_model, input=json_digest(structured)) if cache is not None else None
+            refined = cache.get(vision_key) if cache is not None else None
+            if refined is None:
+                try:
+                    backend = DiskBackend(cache) if cache is not None else default_cache.backend
+                    vision_cache = VisionCache(backend, ttl=vision_cache_ttl)
+                    refined = refine_with_vision(structured, model=vision_model, verbose=verbose, client=vision_client, section_refs=section_refs, cache=vision_cache, stats=collector)
+                    # refine_with_vision hands back its input when no chunk could be refined
+                    if cache is not None and refined is not structured:
+                        cache.put(vision_key, refined)
+                except Exception as e:
+                    if verbose:
+                        print(f"Vision refinement failed: {e}")
+            structured = refined if refined is not None else structured
+
+    if cache is not None and verbose:
+        print(f"Parse cache: {cache.hits} hits, {cache.misses} misses")
+
+    if fingerprints:
+        structured = {**structured, "fingerprints": {"options": options_digest(options), "pages": page_digests, "fonts": [page_fonts(p).to_list() for p in pages]}}
+
+    if collector is not None:
+        if cache is not None:
+            collector.count("parse_cache_hits", cache.hits)
+            collector.count("parse_cache_misses", cache.misses)
+        if stats:
+            structured = {**structured, "stats": collector.to_dict()}
 
     return structured
+
+
+def reparse_pdf(
+    path: PdfInput,
+    previous: Dict[str, Any],
+    fingerprints: Optional[Dict[str, Any]] = None,
+    images_dir: Optional[str] = None,
+    ocr_mode: str = "if-needed",
+    ocr_dpi: int = 300,
+    use_vision: bool = False,
+    vision_model: str = "gpt-4o-mini",
+    max_pages: Optional[int] = None,
+    page_range: Optional[str] = None,
+    verbose: bool = False,
+    workers: int = 1,
+    image_format: str = "png",
+    image_dedupe: str = "xref",
+    ocr_workers: int = 1,
+    ocr_color: str = "gray",
+    ocr_adaptive_dpi: bool = True,
+    ocr_regions: bool = False,
+    ocr_backend: OcrBackendSpec = "auto",
+    section_refs: bool = False,
+    vision_client: Any = None,
+    vision_cache_ttl: Optional[float] = None,
+    stats: bool = False,
+    stats_hook: Optional[StatsHook] = None,
+    profile: str = "full",
+) -> Dict[str, Any]:
+    """Update ``previous`` (a ``parse_pdf(..., fingerprints=True)`` result) for a changed PDF.
+
+    Pages whose content digest and image ids match the previous run are reused
+    as they are; only new or changed pages are extracted, OCRed, structured and
+    (with ``use_vision``) sent to the vision model. ``fingerprints`` defaults to
+    ``previous["fingerprints"]``; if it is missing or was made with different
+    options, every page is parsed again. So is every page when the changes move
+    the document's heading styles (see ``fonts.FontStats``), since unchanged pages
+    would be classified differently. Meta and sections are rebuilt for the whole
+    document. The result carries fresh fingerprints.
+    """
+    options = ParseOptions(
+        images_dir=images_dir,
+        ocr_mode=ocr_mode,
+        ocr_dpi=ocr_dpi,
+        use_vision=use_vision,
+        vision_model=vision_model,
+        max_pages=max_pages,
+        page_range=page_range,
+        verbose=verbose,
+        workers=workers,
+        image_format=image_format,
+        image_dedupe=image_dedupe,
+        ocr_workers=ocr_workers,
+        ocr_color=ocr_color,
+        ocr_adaptive_dpi=ocr_adaptive_dpi,
+        ocr_regions=ocr_regions,
+        section_refs=section_refs,
+        vision_cache_ttl=vision_cache_ttl,
+        stats=stats,
+        fingerprints=True,
+        profile=profile,
+    )
+    if fingerprints is None:
+        fingerprints = previous.get("fingerprints") or {}
+    if images_dir:
+        os.makedirs(images_dir, exist_ok=True)
+
+    collector = ParseStats(stats_hook) if stats or stats_hook else None
+
+    def stage(name: str):
+        return collector.stage(name) if collector is not None else contextlib.nullcontext()
+
+    # (page number, digest) -> previous structured page and its font histogram
+    reusable: Dict[Tuple[int, str], Tuple[Dict[str, Any], List[List[Any]]]] = {}
+    previous_fonts = FontStats()
+    if fingerprints.get("options") == options_digest(options) and "fonts" in fingerprints:
+        for p, d, f in zip(previous.get("pages", []), fingerprints.get("pages", []), fingerprints["fonts"]):
+            reusable[(p["number"], d)] = (p, f)
+            previous_fonts.update(FontStats.from_list(f))
+
+    with DocumentSession(path) as session:
+        idxs = select_pages(session, max_pages=max_pages, page_range=page_range)
+        with stage("fingerprint"):
+            digests = page_fingerprints(session.doc, idxs)
+        registry = ImageRegistry(images_dir, image_format=image_format, dedupe=image_dedupe)
+        if profile == "full":
+            registry.scan(session.doc, idxs)
+
+        def reuse(i: int, digest: str) -> Optional[Tuple[Dict[str, Any], List[List[Any]]]]:
+            old = reusable.get((i + 1, digest))
+            # An edit elsewhere can move an image's first page, which renames it
+            if old is None or any(img.get("id") != registry.image_id(img.get("xref"), i) or (img.get("path") and not os.path.exists(img["path"])) for img in old[0].get("images", [])):
+                return None
+            return old
+
+        kept = {i: old for i, d in zip(idxs, digests) for old in [reuse(i, d)] if old is not None}
+        changed = [i for i in idxs if i not in kept]
+        if verbose:
+            print(f"Reparse: {len(kept)} pages unchanged, {len(changed)} to parse")
+
+        # The first page as extracted, before OCR, if it is parsed again (title/author heuristics look at it)
+        first: Optional[Dict[str, Any]] = None
+
+        def parse_raw(todo: List[int]) -> List[Dict[str, Any]]:
+            nonlocal first
+            with stage("extract"):
+                raw = list(iter_pages(session, todo, images_dir=images_dir, workers=workers, verbose=verbose, image_format=image_format, image_dedupe=image_dedupe, stats=collector, registry=registry, profile=profile))
+            if todo and todo[0] == idxs[0]:
+                first = raw[0]
+            if ocr_mode in {"if-needed", "always"}:
+                with stage("ocr"):
+                    raw = ocr_pages_if_needed(path, raw, mode=ocr_mode, dpi=ocr_dpi, verbose=verbose, workers=ocr_workers, session=session, compact=True, stats=collector, color=ocr_color, adaptive_dpi=ocr_adaptive_dpi, regions=ocr_regions, backend=ocr_backend)
+            return raw
+
+        raw = parse_raw(changed)
+        fonts = document_fonts(raw)
+        for _, f in kept.values():
+            fonts.update(FontStats.from_list(f))
+        if kept and fonts.heading_levels() != previous_fonts.heading_levels():
+            if verbose:
+                print("Reparse: heading styles changed, parsing all pages")
+            raw = sorted(raw + parse_raw(sorted(kept)), key=lambda p: p["number"])
+            changed, kept = idxs, {}
+            fonts = document_fonts(raw)
+        if collector is not None:
+            collector.count("pages_reused", len(kept))
+
+        with stage("extract"):
+            # Title/author heuristics need the first page's raw blocks, even when it is reused;
+            # extract it with the run's profile so meta matches a full parse
+            if idxs:
+                if first is None:
+                    first = next(iter_pages(session, idxs[:1], profile=profile))
+                meta = document_meta(session.doc, first, len(idxs))
+            else:
+                meta = document_meta(session.doc, None, 0)
+        fresh = {page["number"] - 1: structure_page(page, fonts) for page in raw}
+        page_font_lists = {page["number"] - 1: page_fonts(page).to_list() for page in raw}
+
+    out_meta = build_meta(meta, len(idxs))
+    if use_vision and fresh:
+        with stage("vision"):
+            try:
+                backend = default_cache.backend
+                refined = refine_with_vision({"meta": out_meta, "pages": [fresh[i] for i in changed], "sections": []}, model=vision_model, verbose=verbose, client=vision_client, section_refs=section_refs, cache=VisionCache(backend, ttl=vision_cache_ttl), stats=collector)
+                fresh = {p["number"] - 1: p for p in refined["pages"]}
+            except Exception as e:
+                if verbose:
+                    print(f"Vision refinement failed: {e}")
+
+    with stage("structure"):
+        pages = [kept[i][0] if i in kept else fresh[i] for i in idxs]
+        result = {"meta": out_meta, "pages": pages, "sections": build_sections(pages, out_meta.get("toc") or [], refs=section_refs)}
+    result["fingerprints"] = {"options": options_digest(options), "pages": digests, "fonts": [kept[i][1] if i in kept else page_font_lists[i] for i in idxs]}
+    if stats:
+        result["stats"] = collector.to_dict()
+    return result
+
+
+def iter_parse_pdf(
+    path: PdfInput,
+    images_dir: Optional[str] = None,
+    ocr_mode: str = "if-needed",
+    ocr_dpi: int = 300,
+    max_pages: Optional[int] = None,
+    page_range: Optional[str] = None,
+    verbose: bool = False,
+    workers: int = 1,
+    image_format: str = "png",
+    image_dedupe: str = "xref",
+    ocr_workers: int = 1,
+    ocr_color: str = "gray",
+    ocr_adaptive_dpi: bool = True,
+    ocr_regions: bool = False,
+    ocr_backend: OcrBackendSpec = "auto",
+    section_refs: bool = False,
+    stats: bool = False,
+    stats_hook: Optional[StatsHook] = None,
+    profile: str = "full",
+    font_pass: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Parse a PDF page by page.
+
+    Yields one structured page (``PageOut``) as soon as it is extracted, OCRed and
+    classified, then a final trailer dict with keys: meta, sections. Raw page data
+    (spans, OCR renders) is dropped once a page is yielded, so memory stays bounded
+    by the extraction window rather than the document size. Vision refinement needs
+    the whole document and is not available here; use ``parse_pdf`` for it.
+    ``stats`` adds a ``stats`` section to the trailer; stages overlap when
+    streaming, so it has per-page timings and a single ``total`` stage.
+    Heading levels come from the document's font histogram. With ``font_pass``
+    it is counted in a "text" profile pass over all pages before the first one
+    is yielded. That pass runs the same text extraction again, so it costs
+    about 40% more time on text-heavy documents and delays the first page by
+    the time it takes to scan the whole document. Without it, the histogram
+    grows as pages are extracted: the first page comes out at once, but early
+    pages can get different levels than ``parse_pdf`` gives them. Styles of OCR
+    text always join the histogram as their pages are recognized, so on OCRed
+    documents early pages can differ either way.
+    """
+    if images_dir:
+        os.makedirs(images_dir, exist_ok=True)
+
+    collector = ParseStats(stats_hook) if stats or stats_hook else None
+    with DocumentSession(path) as session, (collector.stage("total") if collector is not None else contextlib.nullcontext()):
+        idxs = select_pages(session, max_pages=max_pages, page_range=page_range)
+        meta = None
+        # Heading styles depend on the whole document, not just the pages seen so far
+        fonts = document_fonts(iter_pages(session, idxs, workers=workers, profile="text")) if font_pass else FontStats()
+        # Page number -> font histogram of its text layer, until the page is structured
+        native_fonts: Dict[int, List[List[Any]]] = {}
+
+        def raw_pages():
+            nonlocal meta
+            for page in iter_pages(session, idxs, images_dir=images_dir, workers=workers, verbose=verbose, image_format=image_format, image_dedupe=image_dedupe, stats=collector, profile=profile):
+                if meta is None:
+                    # Title/author heuristics look at the first page before OCR, as in parse_pdf
+                    meta = document_meta(session.doc, page, len(idxs))
+                native_fonts[page["number"]] = page.get("fonts") or []
+                yield page
+
+        structured_pages: List[Dict[str, Any]] = []
+        for page in iter_ocr_pages(session, raw_pages(), mode=ocr_mode, dpi=ocr_dpi, verbose=verbose, workers=ocr_workers, stats=collector, color=ocr_color, adaptive_dpi=ocr_adaptive_dpi, regions=ocr_regions, backend=ocr_backend):
+            session.release(page["number"] - 1)
+            native = native_fonts.pop(page["number"])
+            if not font_pass:
+                fonts.update(page_fonts(page))
+            elif (page.get("ocr") or {}).get("needed"):
+                # Styles of the page's OCR blocks join the histogram once it is recognized
+                fonts.update(FontStats(page_fonts(page).counts - FontStats.from_list(native).counts))
+            out = structure_page(page, fonts)
+            structured_pages.append(out)
+            yield out
+
+        if meta is None:
+            meta = document_meta(session.doc, None, 0)
+        out_meta = build_meta(meta, len(structured_pages))
+        trailer = {"meta": out_meta, "sections": build_sections(structured_pages, out_meta.get("toc") or [], refs=section_refs)}
+    if stats:
+        trailer["stats"] = collector.to_dict()
+    yield trailer
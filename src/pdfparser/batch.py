@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+import glob
+import os
+import time
+import traceback
+
+from .api import parse_pdf
+
+
+@dataclass
+class BatchResult:
+    input: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """Resolve files, directories (searched recursively for *.pdf) and glob patterns, dropping duplicates."""
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+            found += glob.glob(os.path.join(item, "**", "*.PDF"), recursive=True)
+        elif glob.has_magic(item):
+            found = glob.glob(item, recursive=True)
+        else:
+            found = [item]
+        paths.extend(sorted(found))
+    seen = set()
+    return [p for p in paths if not (p in seen or seen.add(p))]
+
+
+def output_names(paths: List[str], ext: str = ".json") -> Dict[str, str]:
+    """Map each input to a unique output file name based on its stem."""
+    names: Dict[str, str] = {}
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}"
+        used.add(name)
+        names[path] = name + ext
+    return names
+
+
+def _parse_one(path: str, options: Dict[str, Any]) -> BatchResult:
+    # Runs in a pool worker; failures are returned rather than raised so one bad file can't stop the batch
+    t0 = time.perf_counter()
+    try:
+        return BatchResult(path, result=parse_pdf(path, **options), seconds=time.perf_counter() - t0)
+    except Exception:
+        return BatchResult(path, error=traceback.format_exc(limit=3).strip(), seconds=time.perf_counter() - t0)
+
+
+def _collect(fut: Future, path: str, t0: float) -> BatchResult:
+    # The worker's BatchResult, or an error result if the worker died or the result couldn't come back
+    try:
+        return fut.result()
+    except BrokenProcessPool:
+        return BatchResult(path, error="Worker process died while parsing this file (crash or killed)", seconds=time.perf_counter() - t0)
+    except Exception:
+        return BatchResult(path, error=traceback.format_exc(limit=3).strip(), seconds=time.perf_counter() - t0)
+
+
+def _iter_isolated(paths: List[str], jobs: int, opts) -> Iterator[BatchResult]:
+    """Parse each input in a process of its own, ``jobs`` at a time, so a crash only fails that input."""
+    todo = deque(paths)
+    running: Dict[Future, Any] = {}
+    try:
+        while todo or running:
+            while todo and len(running) < jobs:
+                path = todo.popleft()
+                pool = ProcessPoolExecutor(max_workers=1)
+                running[pool.submit(_parse_one, path, opts(path))] = (path, pool, time.perf_counter())
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, pool, t0 = running.pop(fut)
+                pool.shutdown()
+                yield _collect(fut, path, t0)
+    finally:
+        for _, pool, _ in running.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_batch(paths: List[str], jobs: int = 1, images_dir: Optional[str] = None, **options: Any) -> Iterator[BatchResult]:
+    """Parse many PDFs, yielding a ``BatchResult`` per input as each one finishes.
+
+    With ``jobs`` > 1 documents are spread over one process pool that lives for
+    the whole batch, so interpreter startup and imports are paid once per worker.
+    If a worker process dies (a crash in MuPDF, an OOM kill), the pool is lost
+    with every input it had not finished; those inputs are parsed again, each
+    in its own process, so only the one that kills its worker fails.
+    ``images_dir`` gets one subdirectory per input so image ids can't collide.
+    """
+    names = output_names(paths, ext="")
+
+    def opts(path: str) -> Dict[str, Any]:
+        return {**options, "images_dir": os.path.join(images_dir, names[path]) if images_dir else None}
+
+    if jobs <= 1:
+        for path in paths:
+            yield _parse_one(path, opts(path))
+        return
+    unfinished = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        t0 = time.perf_counter()
+        futures = {pool.submit(_parse_one, path, opts(path)): path for path in paths}
+        for fut in as_completed(futures):
+            if isinstance(fut.exception(), BrokenProcessPool):
+                unfinished.append(futures[fut])
+                continue
+            yield _collect(fut, futures[fut], t0)
+    if unfinished:
+        yield from _iter_isolated([p for p in paths if p in set(unfinished)], jobs, opts)
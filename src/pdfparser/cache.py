@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+import hashlib
+import json
+import os
+import tempfile
+
+# Eviction frees space down to this share of max_bytes, so a full cache isn't walked on every write
+EVICT_TO = 0.9
+# File in the cache directory holding the total size of its entries
+SIZE_FILE = "size"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def json_digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """Content-addressed on-disk cache for pipeline stage results.
+
+    Entries are JSON files under ``cache_dir/<stage>/``, keyed by the document
+    digest plus the options that affect that stage, so each stage hits or misses
+    independently. Reads refresh an entry's mtime; writes evict least recently
+    used entries once the cache grows past ``max_bytes``. The total size is
+    kept in ``SIZE_FILE`` and updated by every write, so opening the cache and
+    writing to it don't walk the directory; only an eviction does, and it
+    recounts the total from disk.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_path = os.path.join(cache_dir, SIZE_FILE)
+        size = self._stored_size()
+        if size is None:
+            size = sum(size for _, size, _ in self._entries())
+            self._store_size(size)
+        self.size = size
+
+    def key(self, stage: str, digest: str, **options: Any) -> str:
+        return f"{stage}/{json_digest({'doc': digest, **options})}"
+
+    def _path(self, key: str) -> str:
+        stage, name = key.split("/", 1)
+        return os.path.join(self.cache_dir, stage, f"{name}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            written, replaced = _file_size(tmp), _file_size(path)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        # Start from the stored total so writes by other processes sharing the directory count too
+        stored = self._stored_size()
+        self.size = (self.size if stored is None else stored) + written - replaced
+        if self.size > self.max_bytes:
+            self.evict()
+        else:
+            self._store_size(self.size)
+
+    def _stored_size(self) -> Optional[int]:
+        try:
+            with open(self._size_path, "r", encoding="utf-8") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _store_size(self, size: int) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(size))
+            os.replace(tmp, self._size_path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """``(mtime, size, path)`` of every entry on disk."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in ``EVICT_TO * max_bytes``."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self.size = total
+        self._store_size(total)
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
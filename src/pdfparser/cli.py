@@ -2,22 +2,52 @@ from __future__ import annotations
 
 import argparse
 import json
-from .api import parse_pdf
+import os
+import sys
+from .api import iter_parse_pdf, parse_pdf, reparse_pdf
+from .batch import expand_inputs, iter_batch, output_names
+from .output import document_items, write_json, write_jsonl
+from .stats import format_stats
+
+# parse_pdf options iter_parse_pdf does not take: vision and caching need the whole document
+WHOLE_DOCUMENT_OPTIONS = ("use_vision", "vision_model", "cache_dir", "cache_max_bytes", "fingerprints")
+# parse_pdf options reparse_pdf does not take
+REPARSE_EXCLUDED_OPTIONS = ("cache_dir", "cache_max_bytes", "fingerprints")
 
 
 def main():
     p = argparse.ArgumentParser(description="Parse a PDF into structured content (headings, paragraphs, images)")
-    p.add_argument("input", help="Path to input PDF")
-    p.add_argument("--out", help="Write output JSON to file; default stdout")
+    p.add_argument("input", nargs="+", help="Input PDF(s); directories and glob patterns select several files (batch mode)")
+    p.add_argument("--out", help="Write output JSON (or JSONL in batch mode) to file; default stdout")
+    p.add_argument("--format", choices=["json", "jsonl"], default="json", help="json: one document; jsonl: one page per line, written as pages finish, then a meta/sections line")
+    p.add_argument("--compact", action="store_true", help="Write JSON without indentation")
+    p.add_argument("--section-refs", action="store_true", help="Sections reference page items by page and index instead of embedding copies")
+    p.add_argument("--out-dir", help="Batch mode: write one <name>.json per input into this directory")
+    p.add_argument("--jsonl", action="store_true", help="Batch mode: write one JSON line per input to --out or stdout")
+    p.add_argument("--jobs", type=int, default=1, help="Batch mode: documents parsed concurrently (default 1)")
     p.add_argument("--images-dir", help="Directory to save extracted images")
-    p.add_argument("--dpi", type=int, default=300, help="DPI for OCR rendering")
+    p.add_argument("--image-format", choices=["png", "native"], default="png", help="Save images as PNG, or keep embedded JPEG/JPX streams as-is (native)")
+    p.add_argument("--image-dedupe", choices=["xref", "content"], default="xref", help="Save each image xref once (default), or also merge byte-identical images (content)")
+    p.add_argument("--dpi", type=int, default=300, help="Maximum DPI for OCR rendering (the exact DPI with --ocr-fixed-dpi)")
     g = p.add_mutually_exclusive_group()
     g.add_argument("--ocr", action="store_true", help="Force OCR all pages")
     g.add_argument("--ocr-if-needed", action="store_true", help="OCR only pages with low/no text")
+    p.add_argument("--ocr-workers", type=int, default=1, help="Concurrent tesseract processes for OCR (default 1)")
+    p.add_argument("--ocr-color", choices=["rgb", "gray", "mono"], default="gray", help="Colour mode pages are rendered in for OCR (default gray)")
+    p.add_argument("--ocr-fixed-dpi", action="store_true", help="Render every OCR page at --dpi instead of choosing a DPI per page (up to --dpi)")
+    p.add_argument("--ocr-regions", action="store_true", help="On pages with a text layer, OCR only the image areas")
+    p.add_argument("--ocr-backend", choices=["auto", "tesserocr", "cli", "pytesseract"], default="auto", help="OCR engine: tesserocr keeps tesseract loaded in-process, cli feeds a tesseract process through stdin, pytesseract uses temp files (default auto: tesserocr if installed, else pytesseract)")
     p.add_argument("--vision", action="store_true", help="Use Vision LLM to refine structure")
     p.add_argument("--model", default="gpt-4o-mini", help="Vision model name")
     p.add_argument("--max-pages", type=int)
     p.add_argument("--page-range", help="e.g. 1-5,8,10-12")
+    p.add_argument("--extract", choices=["text", "layout", "full"], default="full", help="What extraction collects: block text and sizes only (text), also span details (layout), also images and links (full, default)")
+    p.add_argument("--workers", type=int, default=1, help="Worker processes for page extraction (default 1)")
+    p.add_argument("--cache-dir", help="Cache extraction, OCR and vision results on disk in this directory")
+    p.add_argument("--cache-max-mb", type=int, default=1024, help="Evict least recently used cache entries above this size (default 1024)")
+    p.add_argument("--fingerprints", action="store_true", help="Include per-page content digests so the output can be passed to --previous later")
+    p.add_argument("--previous", help="Output of an earlier --fingerprints run on a previous version of the PDF; only changed pages are parsed again")
+    p.add_argument("--profile", action="store_true", help="Include a stats section in the output and print a stage/page timing summary to stderr")
     p.add_argument("--verbose", action="store_true")
 
     args = p.parse_args()
@@ -28,9 +58,7 @@ def main():
     elif args.ocr_if_needed:
         ocr_mode = "if-needed"
 
-    result = parse_pdf(
-        path=args.input,
-        images_dir=args.images_dir,
+    options = dict(
         ocr_mode=ocr_mode,
         ocr_dpi=args.dpi,
         use_vision=args.vision,
@@ -38,14 +66,116 @@ def main():
         max_pages=args.max_pages,
         page_range=args.page_range,
         verbose=args.verbose,
+        workers=args.workers,
+        image_format=args.image_format,
+        image_dedupe=args.image_dedupe,
+        ocr_workers=args.ocr_workers,
+        ocr_color=args.ocr_color,
+        ocr_adaptive_dpi=not args.ocr_fixed_dpi,
+        ocr_regions=args.ocr_regions,
+        ocr_backend=args.ocr_backend,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        section_refs=args.section_refs,
+        stats=args.profile,
+        fingerprints=args.fingerprints,
+        profile=args.extract,
     )
 
-    js = json.dumps(result, ensure_ascii=False, indent=2)
-    if args.out:
-        with open(args.out, "w", encoding="utf-8") as f:
-            f.write(js)
-    else:
-        print(js)
+    paths = expand_inputs(args.input)
+    if not paths:
+        raise SystemExit(f"No input PDFs matched: {' '.join(args.input)}")
+    batch = len(paths) != 1 or paths != args.input or args.out_dir or args.jsonl or args.jobs > 1
+    if batch:
+        if args.previous:
+            raise SystemExit("--previous takes a single input PDF")
+        sys.exit(run_batch(paths, args, options))
+
+    def parse_document():
+        if args.previous:
+            with open(args.previous, encoding="utf-8") as f:
+                previous = json.load(f)
+            return reparse_pdf(paths[0], previous, images_dir=args.images_dir, **{k: v for k, v in options.items() if k not in REPARSE_EXCLUDED_OPTIONS})
+        return parse_pdf(path=paths[0], images_dir=args.images_dir, **options)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        if args.format == "jsonl":
+            if args.previous or any(options[k] for k in ("use_vision", "cache_dir", "fingerprints")):
+                items = document_items(parse_document())
+            else:
+                stream_options = {k: v for k, v in options.items() if k not in WHOLE_DOCUMENT_OPTIONS}
+                items = iter_parse_pdf(paths[0], images_dir=args.images_dir, **stream_options)
+            last = None
+            def tracked(items):
+                nonlocal last
+                for last in items:
+                    yield last
+            write_jsonl(tracked(items), out)
+            if args.profile:
+                print_profile(last.get("stats"))
+        else:
+            result = parse_document()
+            write_json(result, out, compact=args.compact)
+            if out is sys.stdout:
+                out.write("\n")
+            if args.profile:
+                print_profile(result.get("stats"))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def run_batch(paths, args, options) -> int:
+    """Parse every input, write results as they finish and print a summary; returns the exit code."""
+    if not args.out_dir and not args.jsonl:
+        raise SystemExit("Batch mode needs --out-dir or --jsonl")
+    names = output_names(paths, ext=f".{args.format}")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    stream = None
+    if args.jsonl:
+        stream = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+
+    failed = []
+    ok = 0
+    try:
+        for res in iter_batch(paths, jobs=args.jobs, images_dir=args.images_dir, **options):
+            if not res.ok:
+                failed.append(res)
+                print(f"FAILED {res.input} ({res.seconds:.1f}s)", file=sys.stderr)
+                if stream is not None:
+                    stream.write(json.dumps({"input": res.input, "error": res.error}, ensure_ascii=False) + "\n")
+                continue
+            ok += 1
+            if args.out_dir:
+                with open(os.path.join(args.out_dir, names[res.input]), "w", encoding="utf-8") as f:
+                    if args.format == "jsonl":
+                        write_jsonl(document_items(res.result), f)
+                    else:
+                        write_json(res.result, f, compact=args.compact)
+            if stream is not None:
+                stream.write(json.dumps({"input": res.input, "result": res.result}, ensure_ascii=False) + "\n")
+                stream.flush()
+            if args.verbose:
+                print(f"ok {res.input} ({res.seconds:.1f}s)", file=sys.stderr)
+            if args.profile:
+                print(f"== {res.input}", file=sys.stderr)
+                print_profile(res.result.get("stats"))
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+
+    print(f"Batch: {ok} ok, {len(failed)} failed, {len(paths)} total", file=sys.stderr)
+    for res in failed:
+        print(f"  {res.input}: {res.error.splitlines()[-1]}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def print_profile(stats):
+    if stats:
+        sys.stderr.flush()
+        print(format_stats(stats), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
 from PIL import Image
+import hashlib
 import io
+import math
 import os
+import time
+
+from .fonts import FontStats
+from .model import RawBlock, pages_to_dicts, text_blocks
+from .session import DocumentSession
+from .source import PdfInput
+from .stats import ParseStats
 
 
 def parse_page_range(page_range: Optional[str], page_count: int) -> List[int]:
@@ -26,95 +38,305 @@ def parse_page_range(page_range: Optional[str], page_count: int) -> List[int]:
     return sorted(pages)
 
 
-def extract_pages(path: str, images_dir: Optional[str] = None, max_pages: Optional[int] = None, page_range: Optional[str] = None, verbose: bool = False):
-    doc = fitz.open(path)
-    idxs = parse_page_range(page_range, doc.page_count)
-    if not idxs:
-        idxs = list(range(doc.page_count))
-    if max_pages is not None:
-        idxs = idxs[:max_pages]
+# Embedded stream filters that are written as-is with image_format="native"
+NATIVE_IMAGE_EXTS = {"/DCTDecode": "jpg", "/JPXDecode": "jp2"}
+
+
+def image_ext(doc, xref: int, image_format: str = "png") -> str:
+    """File extension ``image_bytes`` will produce for ``xref``; reads only the stream dictionary."""
+    if image_format == "native":
+        kind, value = doc.xref_get_key(xref, "Filter")
+        if kind == "name" and value in NATIVE_IMAGE_EXTS:
+            return NATIVE_IMAGE_EXTS[value]
+    elif image_format != "png":
+        raise ValueError(f"Unknown image_format: {image_format!r}")
+    return "png"
+
+
+def image_bytes(doc, xref: int, image_format: str = "png") -> Tuple[bytes, str]:
+    """Return ``(data, extension)`` for an image xref.
+
+    ``image_format="png"`` decodes to a pixmap and encodes PNG (CMYK is converted to RGB).
+    ``image_format="native"`` returns the embedded JPEG/JPX stream untouched and falls
+    back to PNG for other encodings.
+    """
+    ext = image_ext(doc, xref, image_format)
+    if ext != "png":
+        return doc.xref_stream_raw(xref), ext
+    pix = fitz.Pixmap(doc, xref)
+    if pix.n - pix.alpha >= 4:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return pix.tobytes("png"), "png"
+
+
+class ImageRegistry:
+    """Document-level table of unique images.
+
+    Built by ``scan`` in a cheap pre-pass over the selected pages (no pixel
+    decoding). Every xref maps to a canonical image, which is the xref itself or,
+    with ``dedupe="content"``, the first xref whose raw stream has the same digest.
+    Each canonical image gets one ``id`` and is written once, by the page where it
+    first appears, so serial, parallel and streaming runs produce the same files.
+    """
+
+    def __init__(self, images_dir: Optional[str] = None, image_format: str = "png", dedupe: str = "xref"):
+        if dedupe not in {"xref", "content"}:
+            raise ValueError(f"Unknown image dedupe mode: {dedupe!r}")
+        self.images_dir = images_dir
+        self.image_format = image_format
+        self.dedupe = dedupe
+        self.canonical: Dict[int, int] = {}  # xref -> canonical xref
+        self.first_page: Dict[int, int] = {}  # canonical xref -> 0-based page index
+        self._written: set = set()
+        self.bytes_written = 0  # in this process; workers report their share per page
+
+    def scan(self, doc, idxs: List[int]) -> "ImageRegistry":
+        digests: Dict[str, int] = {}
+        for i in idxs:
+            for img in doc.get_page_images(i, full=True):
+                xref = img[0]
+                if xref in self.canonical:
+                    continue
+                canon = xref
+                if self.dedupe == "content":
+                    canon = digests.setdefault(_image_digest(doc, xref, img[1]), xref)
+                self.canonical[xref] = canon
+                self.first_page.setdefault(canon, i)
+        return self
+
+    def image_id(self, xref: int, i: int) -> str:
+        canon = self.canonical.get(xref, xref)
+        return f"img_{self.first_page.get(canon, i)+1:04d}_{canon}"
+
+    def is_owner(self, xref: int, i: int) -> bool:
+        """True if page index ``i`` is where the canonical image for ``xref`` is first seen."""
+        return self.first_page.get(self.canonical.get(xref, xref), i) == i
+
+    def save(self, doc, xref: int, i: int) -> str:
+        """Return the output path for ``xref``, decoding and writing it only on its owner page."""
+        canon = self.canonical.get(xref, xref)
+        out_path = os.path.join(self.images_dir, f"{self.image_id(xref, i)}.{image_ext(doc, canon, self.image_format)}")
+        if self.is_owner(xref, i) and canon not in self._written:
+            data, _ = image_bytes(doc, canon, image_format=self.image_format)
+            with open(out_path, "wb") as f:
+                f.write(data)
+            self._written.add(canon)
+            self.bytes_written += len(data)
+        return out_path
+
+
+def _image_digest(doc, xref: int, smask: int = 0) -> str:
+    h = hashlib.sha256(doc.xref_stream_raw(xref) or b"")
+    if smask:
+        h.update(doc.xref_stream_raw(smask) or b"")
+    return h.hexdigest()
+
+
+def image_placements(page) -> Dict[int, List[Tuple[float, float, float, float]]]:
+    """Map xref -> bbox of every placement on the page, from a single content-stream pass."""
+    index: Dict[int, List[Tuple[float, float, float, float]]] = {}
+    try:
+        for info in page.get_image_info(xrefs=True):
+            xref = info.get("xref")
+            if xref:  # 0 for inline images, which get_images does not list
+                index.setdefault(xref, []).append(info.get("bbox"))
+    except Exception:
+        pass
+    return index
+
+
+# Extraction profiles, from cheapest to most complete:
+#   text    block text and bbox, span sizes and flags (enough for headings)
+#   layout  full span records (text, size, font, flags, bbox)
+#   full    layout plus images and links
+PROFILES = ("text", "layout", "full")
+# "dict" text flags per profile. The lighter ones leave out TEXT_PRESERVE_IMAGES so
+# images are not decoded; without image blocks MuPDF may join text blocks that an
+# image used to separate, so "full" keeps the default.
+TEXT_FLAGS = {
+    "text": fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES,
+    "layout": fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES,
+    "full": fitz.TEXTFLAGS_DICT,
+}
+
+
+def check_profile(profile: str) -> str:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile!r}")
+    return profile
+
 
-    pages = []
-    for i in idxs:
-        page = doc.load_page(i)
-        width, height = page.rect.width, page.rect.height
-        textpage = page.get_text("dict")
-        blocks: List[Dict[str, Any]] = []
-        for b in textpage.get("blocks", []):
-            if b.get("type", 0) == 0:  # text
-                bbox = b.get("bbox")
-                text = "\n".join([line.get("spans", [{}])[0].get("text", "") for line in b.get("lines", [])])
-                # Collect style info from spans
-                spans: List[Dict[str, Any]] = []
-                for line in b.get("lines", []):
-                    for sp in line.get("spans", []):
-                        spans.append({
-                            "text": sp.get("text", ""),
-                            "size": sp.get("size"),
-                            "font": sp.get("font"),
-                            "flags": sp.get("flags"),
-                            "bbox": sp.get("bbox"),
-                        })
-                blocks.append({
-                    "type": "text",
-                    "text": text,
-                    "bbox": bbox,
-                    "spans": spans,
-                })
-
-        images: List[Dict[str, Any]] = []
-        for img in page.get_images(full=True):
-            xref = img[0]
-            pix = fitz.Pixmap(doc, xref)
-            if pix.n - pix.alpha >= 4:
-                pix = fitz.Pixmap(fitz.csRGB, pix)
-            img_bytes = pix.tobytes("png")
-            bbox = None  # PyMuPDF doesn't directly provide bbox per image from get_images
-            # Optional: derive rough bbox from page.get_image_info (PyMuPDF 1.24+)
-            try:
-                infos = page.get_image_info(xrefs=[xref])
-                if infos:
-                    bbox = infos[0].get("bbox")
-            except Exception:
-                pass
+def _extract_page(session: DocumentSession, i: int, registry: ImageRegistry, profile: str = "full") -> Dict[str, Any]:
+    doc = session.doc
+    page = session.load_page(i)
+    width, height = page.rect.width, page.rect.height
+    textpage = session.get_text(i, "dict", flags=TEXT_FLAGS[profile])
+    spans = profile != "text"
+    blocks: List[RawBlock] = []
+    fonts = FontStats()
+    for b in textpage.get("blocks", []):
+        if b.get("type", 0) == 0:  # text
+            text = "\n".join([line.get("spans", [{}])[0].get("text", "") for line in b.get("lines", [])])
+            blk = RawBlock(text, b.get("bbox"))
+            # Collect style info from spans
+            for line in b.get("lines", []):
+                for sp in line.get("spans", []):
+                    fonts.add(sp.get("size") or 0.0, sp.get("flags") or 0, len(sp.get("text", "").strip()))
+                    if spans:
+                        blk.add_span(sp.get("text", ""), sp.get("size"), sp.get("font"), sp.get("flags"), sp.get("bbox"))
+                    else:
+                        blk.add_size(sp.get("size"), sp.get("flags"))
+            blocks.append(blk)
+
+    out = {
+        "number": i + 1,
+        "width": width,
+        "height": height,
+        "raw_blocks": blocks,
+        "fonts": fonts.to_list(),
+        "images": [],
+        "links": [],
+    }
+    if profile != "full":
+        return out
+
+    images: List[Dict[str, Any]] = out["images"]
+    placements = image_placements(page)
+    seen = set()
+    for img in page.get_images(full=True):
+        xref = img[0]
+        if xref in seen:
+            continue  # same xref under several resource names; placements cover them all
+        seen.add(xref)
+        # One record per placement; images listed in resources but never drawn get bbox None
+        for bbox in placements.get(xref) or [None]:
+            # Lazy record: pixels are only decoded when the image is written out
             img_rec = {
+                "id": registry.image_id(xref, i),
                 "xref": xref,
                 "bbox": bbox,
+                "width": img[2],
+                "height": img[3],
             }
-            if images_dir:
-                img_id = f"img_{i+1:04d}_{xref}"
-                out_path = os.path.join(images_dir, f"{img_id}.png")
-                with open(out_path, "wb") as f:
-                    f.write(img_bytes)
-                img_rec["path"] = out_path
+            if registry.images_dir:
+                img_rec["path"] = registry.save(doc, xref, i)
             images.append(img_rec)
 
-        # Links (URIs and intra-doc links)
-        links: List[Dict[str, Any]] = []
-        try:
-            for lnk in page.get_links():
-                uri = lnk.get("uri")
-                target = lnk.get("page")
-                rect = lnk.get("from")  # Rect
-                bbox = [rect.x0, rect.y0, rect.x1, rect.y1] if rect else None
-                links.append({
-                    "bbox": bbox,
-                    "uri": uri,
-                    "target_page": (target + 1) if target is not None else None,
-                    "text": None,  # could be filled by overlapping text later
-                })
-        except Exception:
-            pass
-
-        pages.append({
-            "number": i + 1,
-            "width": width,
-            "height": height,
-            "raw_blocks": blocks,
-            "images": images,
-            "links": links,
-        })
-    # Document-level metadata
+    # Links (URIs and intra-doc links)
+    links: List[Dict[str, Any]] = out["links"]
+    try:
+        for lnk in page.get_links():
+            uri = lnk.get("uri")
+            target = lnk.get("page")
+            rect = lnk.get("from")  # Rect
+            bbox = [rect.x0, rect.y0, rect.x1, rect.y1] if rect else None
+            links.append({
+                "bbox": bbox,
+                "uri": uri,
+                "target_page": (target + 1) if target is not None else None,
+                "text": None,  # could be filled by overlapping text later
+            })
+    except Exception:
+        pass
+
+    return out
+
+
+def _timed_extract(session: DocumentSession, i: int, registry: ImageRegistry, profile: str = "full") -> Tuple[Dict[str, Any], float, int]:
+    # (page, seconds, image bytes written for it)
+    t0, written = time.perf_counter(), registry.bytes_written
+    page = _extract_page(session, i, registry, profile)
+    return page, time.perf_counter() - t0, registry.bytes_written - written
+
+
+def _extract_chunk(source: PdfInput, idxs: List[int], registry: ImageRegistry, profile: str = "full") -> List[Tuple[Dict[str, Any], float, int]]:
+    # Runs in a worker process: each worker opens its own document handle
+    # (``source`` is a path or a ``PdfSource.shared`` reference).
+    with DocumentSession(source) as session:
+        return [_timed_extract(session, i, registry, profile) for i in idxs]
+
+
+def chunk_indices(idxs: List[int], workers: int) -> List[List[int]]:
+    """Split page indices into contiguous chunks, a few per worker for load balancing."""
+    if not idxs:
+        return []
+    size = max(1, math.ceil(len(idxs) / (workers * 4)))
+    return [idxs[k:k + size] for k in range(0, len(idxs), size)]
+
+
+def select_pages(doc, max_pages: Optional[int] = None, page_range: Optional[str] = None) -> List[int]:
+    idxs = parse_page_range(page_range, doc.page_count)
+    if not idxs:
+        idxs = list(range(doc.page_count))
+    if max_pages is not None:
+        idxs = idxs[:max_pages]
+    return idxs
+
+
+def iter_pages(session: DocumentSession, idxs: List[int], images_dir: Optional[str] = None, workers: int = 1, verbose: bool = False, image_format: str = "png", image_dedupe: str = "xref", stats: Optional[ParseStats] = None, registry: Optional[ImageRegistry] = None, profile: str = "full") -> Iterator[Dict[str, Any]]:
+    """Yield raw pages in order.
+
+    With ``workers`` > 1 at most ``2 * workers`` chunks are in flight at a time,
+    so only a bounded window of raw page data is held in memory. ``stats``
+    receives per-page extraction time and image bytes written. Pass a
+    ``registry`` scanned over a wider page selection to extract a subset of
+    pages with the image ids a full run would give them. ``profile`` is one of
+    ``PROFILES``; only "full" collects images and links.
+    """
+    def emit(results):
+        for page, secs, written in results:
+            if stats is not None:
+                stats.page(page["number"], extract_s=secs)
+                stats.count("pages_extracted")
+                if written:
+                    stats.count("image_bytes_written", written)
+            yield page
+
+    check_profile(profile)
+    if registry is None:
+        registry = ImageRegistry(images_dir, image_format=image_format, dedupe=image_dedupe)
+        if profile == "full":
+            registry.scan(session.doc, idxs)
+    if verbose and profile == "full":
+        print(f"Image registry: {len(registry.canonical)} xrefs, {len(registry.first_page)} unique images")
+    if workers > 1 and len(idxs) > 1:
+        chunks = chunk_indices(idxs, workers)
+        if verbose:
+            print(f"Extracting {len(idxs)} pages in {len(chunks)} chunks with {workers} workers")
+        with session.source.shared() as ref, ProcessPoolExecutor(max_workers=workers) as pool:
+            todo = iter(chunks)
+            pending = deque(pool.submit(_extract_chunk, ref, c, registry, profile) for c in islice(todo, workers * 2))
+            while pending:
+                fut = pending.popleft()
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.append(pool.submit(_extract_chunk, ref, nxt, registry, profile))
+                # futures are consumed in submission order, so pages stay sorted
+                yield from emit(fut.result())
+    else:
+        for i in idxs:
+            yield from emit([_timed_extract(session, i, registry, profile)])
+
+
+def extract_pages(path: PdfInput, images_dir: Optional[str] = None, max_pages: Optional[int] = None, page_range: Optional[str] = None, verbose: bool = False, workers: int = 1, image_format: str = "png", image_dedupe: str = "xref", session: Optional[DocumentSession] = None, compact: bool = False, stats: Optional[ParseStats] = None, profile: str = "full"):
+    """Extract raw pages and document metadata.
+
+    ``path`` may also be bytes, a memoryview, an mmap or a file object (see
+    ``source.PdfSource``). Pass an open ``session`` to share the document with
+    later stages; otherwise one is opened and closed here. Pages are returned in the ``types.Page`` dict
+    shape unless ``compact``, which keeps the pipeline's ``RawBlock`` blocks.
+    """
+    if session is None:
+        with DocumentSession(path) as own:
+            return extract_pages(path, images_dir=images_dir, max_pages=max_pages, page_range=page_range, verbose=verbose, workers=workers, image_format=image_format, image_dedupe=image_dedupe, session=own, compact=compact, stats=stats, profile=profile)
+    idxs = select_pages(session, max_pages=max_pages, page_range=page_range)
+    pages = list(iter_pages(session, idxs, images_dir=images_dir, workers=workers, verbose=verbose, image_format=image_format, image_dedupe=image_dedupe, stats=stats, profile=profile))
+    meta = document_meta(session.doc, pages[0] if pages else None, len(pages))
+    return (pages if compact else pages_to_dicts(pages)), meta
+
+
+def document_meta(doc, first: Optional[Dict[str, Any]], page_count: int) -> Dict[str, Any]:
+    """Document-level metadata; ``first`` is the first extracted raw page, used for title/author heuristics."""
     md = doc.metadata or {}
     # Table of Contents
     toc = []
@@ -128,36 +350,35 @@ def extract_pages(path: str, images_dir: Optional[str] = None, max_pages: Option
     # Heuristic: detect document title/authors from first page if metadata missing
     detected_title = None
     detected_authors: List[str] = []
-    if pages:
-        first = pages[0]
+    if first:
+        blocks = text_blocks(first)
         # highest font size block on first page as title candidate
         max_size = -1.0
         best_text = None
-        for b in first.get("raw_blocks", []):
-            if b.get("type") == "text":
-                sizes = [s.get("size") for s in b.get("spans", []) if s.get("size")]
-                if sizes:
-                    s = max(sizes)
-                    t = " ".join(b.get("text", "").split())
-                    if s > max_size and len(t) <= 200 and len(t) >= 3:
-                        max_size = s
-                        best_text = t
+        for b in blocks:
+            sizes = [s for s in b.sizes if s]
+            if sizes:
+                s = max(sizes)
+                t = " ".join(b.text.split())
+                if s > max_size and len(t) <= 200 and len(t) >= 3:
+                    max_size = s
+                    best_text = t
         if best_text:
             detected_title = best_text
         # author heuristic: smaller line(s) below title with commas or typical name pattern
         if detected_title:
             # collect blocks just below title bbox
             title_bbox = None
-            for b in first.get("raw_blocks", []):
-                if " ".join(b.get("text", "").split()) == detected_title:
-                    title_bbox = b.get("bbox")
+            for b in blocks:
+                if " ".join(b.text.split()) == detected_title:
+                    title_bbox = b.bbox
                     break
             if title_bbox:
                 y_top = title_bbox[3]
                 candidate_lines = []
-                for b in first.get("raw_blocks", []):
-                    if b.get("type") == "text" and b.get("bbox")[1] >= y_top and b.get("bbox")[1] <= y_top + 120:
-                        t = " ".join(b.get("text", "").split())
+                for b in blocks:
+                    if b.bbox[1] >= y_top and b.bbox[1] <= y_top + 120:
+                        t = " ".join(b.text.split())
                         if 2 <= len(t) <= 200:
                             candidate_lines.append(t)
                 if candidate_lines:
@@ -174,7 +395,7 @@ def extract_pages(path: str, images_dir: Optional[str] = None, max_pages: Option
         "producer": md.get("producer"),
         "creationDate": md.get("creationDate"),
         "modDate": md.get("modDate"),
-        "pages": len(pages),
+        "pages": page_count,
         "toc": toc,
     }
-    return pages, meta
+    return meta
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Dict, List
+import hashlib
+import re
+
+_REF = re.compile(r"(\d+) \d+ R")
+# Back-references to the page tree and from annotations to their page
+_BACKREF = re.compile(r"/(?:Parent|P)\s*\d+ \d+ R")
+# Page attributes that can be inherited from the page tree
+INHERITED_KEYS = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+class PageHasher:
+    """Content digests of pages, independent of object numbering.
+
+    A page's digest covers its page object, content streams, resources (fonts,
+    images, forms) and annotations. Referenced objects are hashed by content, so
+    an incremental update that rewrites one page leaves the digests of the
+    others unchanged. Links to other pages only contribute the target's page
+    number. Object digests are memoized, so shared fonts and images are read
+    once per document.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.page_of: Dict[int, int] = {doc.page_xref(i): i for i in range(doc.page_count)}
+        self._memo: Dict[int, str] = {}
+
+    def _text(self, text: str) -> str:
+        return _REF.sub(lambda m: f"<{self.object_digest(int(m.group(1)))}>", _BACKREF.sub("", text))
+
+    def object_digest(self, xref: int) -> str:
+        if xref in self.page_of:
+            return f"page {self.page_of[xref]}"
+        memo = self._memo.get(xref)
+        if memo is not None:
+            return memo
+        self._memo[xref] = "cycle"  # placeholder while this object's references are hashed
+        h = hashlib.sha256(self._text(self.doc.xref_object(xref, compressed=True)).encode("utf-8"))
+        if self.doc.xref_is_stream(xref):
+            h.update(self.doc.xref_stream_raw(xref) or b"")
+        self._memo[xref] = digest = h.hexdigest()
+        return digest
+
+    def _inherited(self, xref: int, key: str) -> str:
+        while True:
+            kind, value = self.doc.xref_get_key(xref, key)
+            if kind != "null":
+                return value
+            kind, parent = self.doc.xref_get_key(xref, "Parent")
+            if kind != "xref":
+                return ""
+            xref = int(parent.split()[0])
+
+    def page_digest(self, i: int) -> str:
+        xref = self.doc.page_xref(i)
+        parts = [self._text(self.doc.xref_object(xref, compressed=True))]
+        parts += [f"/{k} {self._text(self._inherited(xref, k))}" for k in INHERITED_KEYS]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def page_fingerprints(doc, idxs: List[int]) -> List[str]:
+    """Content digest of each 0-based page index in ``idxs``."""
+    hasher = PageHasher(doc)
+    return [hasher.page_digest(i) for i in idxs]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .model import RawBlock, text_blocks
+
+# Span flags bit PyMuPDF sets for bold fonts
+BOLD = 16
+# Sizes at least this much above the body size are heading styles
+HEADING_RATIO = 1.15
+MAX_HEADING_LEVEL = 3
+# Bold text at body size is a heading only in blocks this short (run-in headings, not bold paragraphs)
+MAX_BOLD_HEADING_CHARS = 120
+
+Style = Tuple[float, bool]  # (size rounded to 0.5pt, bold)
+
+
+def style_key(size: float, flags: int) -> Style:
+    return (round(size * 2) / 2, bool(flags & BOLD))
+
+
+class FontStats:
+    """Character counts per font style (size, bold) over a set of pages.
+
+    Extraction builds one per page; ``update`` merges them, so a document-wide
+    histogram can be assembled from parallel workers or page by page while
+    streaming. The most used size is the body size; larger sizes, and bold text
+    at body size, are heading styles, ranked by size (bold first) into levels.
+    """
+
+    def __init__(self, counts: Optional[Dict[Style, int]] = None):
+        self.counts: Counter = Counter(counts or {})
+        self._levels: Optional[Dict[Style, int]] = None
+
+    def add(self, size: float, flags: int, chars: int = 1) -> None:
+        if size and chars > 0:
+            self.counts[style_key(size, flags)] += chars
+            self._levels = None
+
+    def add_block(self, blk: RawBlock) -> None:
+        # Weighted by characters when span texts are known ("text" profile blocks only have sizes)
+        texts = blk.span_texts
+        for k, (size, flags) in enumerate(zip(blk.sizes, blk.flags)):
+            self.add(size, flags, len(texts[k].strip()) if texts else 1)
+
+    def update(self, other: "FontStats") -> "FontStats":
+        self.counts.update(other.counts)
+        self._levels = None
+        return self
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[RawBlock]) -> "FontStats":
+        stats = cls()
+        for blk in blocks:
+            stats.add_block(blk)
+        return stats
+
+    @classmethod
+    def from_list(cls, items: Iterable[List[Any]]) -> "FontStats":
+        return cls({(float(size), bool(bold)): int(chars) for size, bold, chars in items})
+
+    def to_list(self) -> List[List[Any]]:
+        """``[[size, bold, chars], ...]`` sorted by size, as stored on raw pages (``Page.fonts``)."""
+        return [[size, int(bold), chars] for (size, bold), chars in sorted(self.counts.items())]
+
+    def body_size(self) -> float:
+        by_size: Counter = Counter()
+        for (size, _), chars in self.counts.items():
+            by_size[size] += chars
+        return max(by_size.items(), key=lambda kv: (kv[1], -kv[0]))[0] if by_size else 0.0
+
+    def heading_levels(self) -> Dict[Style, int]:
+        """Heading level of every heading style; styles not in the map are body text."""
+        if self._levels is None:
+            body = self.body_size()
+            styles = [s for s in self.counts if body and (s[0] >= body * HEADING_RATIO or (s[1] and s[0] >= body))]
+            styles.sort(key=lambda s: (-s[0], not s[1]))
+            self._levels = {s: min(rank + 1, MAX_HEADING_LEVEL) for rank, s in enumerate(styles)}
+        return self._levels
+
+    def block_level(self, blk: RawBlock, text: str) -> Optional[int]:
+        """Heading level of a block from its most common span style, or None for body text.
+
+        Ties go to the smaller style, so a heading line merged into a paragraph
+        block does not turn the paragraph into a heading.
+        """
+        styles = Counter(style_key(size, flags) for size, flags in zip(blk.sizes, blk.flags) if size)
+        if not styles:
+            return None
+        style = max(styles.items(), key=lambda kv: (kv[1], -kv[0][0], not kv[0][1]))[0]
+        level = self.heading_levels().get(style)
+        if level is not None and style[0] < self.body_size() * HEADING_RATIO and len(text) > MAX_BOLD_HEADING_CHARS:
+            return None
+        return level
+
+
+def page_fonts(page: Dict[str, Any]) -> FontStats:
+    """The page's font histogram from extraction, or counted from its blocks if it has none."""
+    items = page.get("fonts")
+    if items is not None:
+        return FontStats.from_list(items)
+    return FontStats.from_blocks(text_blocks(page))
+
+
+def document_fonts(pages: Iterable[Dict[str, Any]]) -> FontStats:
+    stats = FontStats()
+    for page in pages:
+        stats.update(page_fonts(page))
+    return stats
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import sys
+
+
+class RawBlock:
+    """Compact text block used inside the pipeline.
+
+    Span attributes are stored column-wise (one array per attribute) instead of
+    one dict per span. ``to_dict``/``from_dict`` convert to and from the public
+    ``TextBlock`` shape in ``types.py``; missing sizes and flags are stored as 0.
+    Blocks from the "text" extraction profile only have sizes and flags
+    (``add_size``); their spans carry no text, font or bbox.
+    """
+
+    __slots__ = ("text", "bbox", "sizes", "flags", "fonts", "span_texts", "span_bboxes")
+    type = "text"
+
+    def __init__(self, text: str, bbox: Optional[Sequence[float]] = None):
+        self.text = text
+        self.bbox = bbox
+        self.sizes = array("d")
+        self.flags = array("i")
+        self.fonts: List[str] = []
+        self.span_texts: List[str] = []
+        self.span_bboxes = array("d")  # 4 floats per span
+
+    def add_span(self, text: str, size: Optional[float], font: Optional[str], flags: Optional[int], bbox: Optional[Sequence[float]]) -> None:
+        self.span_texts.append(text)
+        self.sizes.append(size or 0.0)
+        self.fonts.append(sys.intern(font) if font else "")
+        self.flags.append(flags or 0)
+        self.span_bboxes.extend(bbox if bbox else (0.0, 0.0, 0.0, 0.0))
+
+    def add_size(self, size: Optional[float], flags: Optional[int]) -> None:
+        self.sizes.append(size or 0.0)
+        self.flags.append(flags or 0)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        b = self.span_bboxes
+        return {
+            "type": "text",
+            "text": self.text,
+            "bbox": self.bbox,
+            "spans": [
+                {
+                    "text": self.span_texts[k],
+                    "size": self.sizes[k],
+                    "font": self.fonts[k],
+                    "flags": self.flags[k],
+                    "bbox": (b[4 * k], b[4 * k + 1], b[4 * k + 2], b[4 * k + 3]),
+                }
+                for k in range(len(self.span_texts))
+            ] or [{"size": size, "flags": flags} for size, flags in zip(self.sizes, self.flags)],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RawBlock":
+        blk = cls(d.get("text", ""), d.get("bbox"))
+        for sp in d.get("spans", []):
+            size = sp.get("size")
+            size = size if isinstance(size, (int, float)) else 0.0
+            if "text" not in sp:
+                blk.add_size(size, sp.get("flags"))
+                continue
+            blk.add_span(sp["text"], size, sp.get("font"), sp.get("flags"), sp.get("bbox"))
+        return blk
+
+
+def text_blocks(page: Dict[str, Any]) -> List[RawBlock]:
+    """The page's text blocks as ``RawBlock``s, converting public dict blocks if needed."""
+    out = []
+    for b in page.get("raw_blocks", []):
+        if isinstance(b, RawBlock):
+            out.append(b)
+        elif b.get("type") == "text":
+            out.append(RawBlock.from_dict(b))
+    return out
+
+
+def compact_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Raw page with compact blocks (inverse of ``page_to_dict``)."""
+    return {**page, "raw_blocks": text_blocks(page)}
+
+
+def page_to_dict(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Raw page in the public ``types.Page`` shape."""
+    return {**page, "raw_blocks": [b.to_dict() if isinstance(b, RawBlock) else b for b in page.get("raw_blocks", [])]}
+
+
+def pages_to_dicts(pages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [page_to_dict(p) for p in pages]
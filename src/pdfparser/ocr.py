@@ -1,41 +1,506 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import io
+import math
+import os
+import statistics
+import subprocess
+import threading
+import time
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 
+try:
+    import tesserocr  # type: ignore
+except Exception:  # pragma: no cover
+    tesserocr = None  # type: ignore
+
+from .cache import ParseCache
+from .fonts import FontStats, page_fonts
+from .model import RawBlock, compact_page, pages_to_dicts, text_blocks
+from .session import DocumentSession
+from .source import PdfInput
+from .stats import ParseStats
+
 
 def has_meaningful_text(page: Dict) -> bool:
     for b in page.get("raw_blocks", []):
-        if b.get("type") == "text" and b.get("text", "").strip():
+        text = b.text if isinstance(b, RawBlock) else (b.get("text", "") if b.get("type") == "text" else "")
+        if text.strip():
             return True
     return False
 
 
-def ocr_pages_if_needed(pdf_path: str, pages: List[Dict], mode: str = "if-needed", dpi: int = 300, verbose: bool = False) -> List[Dict]:
-    doc = fitz.open(pdf_path)
-    new_pages = []
-    for page in pages:
-        need_ocr = mode == "always" or (mode == "if-needed" and not has_meaningful_text(page))
-        if not need_ocr:
-            new_pages.append(page)
+# An image covering this share of the page is treated as a scan of the whole page
+FULL_PAGE_IMAGE = 0.85
+# Pages with images covering at least this share and little text are likely scans
+IMAGE_DOMINANT = 0.5
+# Fewer glyphs than this is a stamp or overlay (page number, watermark), not a text layer
+MIN_GLYPHS = 200
+
+
+def _coverage(boxes: Iterable, area: float) -> Tuple[float, float]:
+    # (summed box area / page area capped at 1, largest single box / page area)
+    total = largest = 0.0
+    for b in boxes:
+        if not b:
             continue
-        i = page["number"] - 1
-        p = doc.load_page(i)
-        mat = fitz.Matrix(dpi/72, dpi/72)
-        pix = p.get_pixmap(matrix=mat)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        text = pytesseract.image_to_string(img)
-        if verbose:
-            print(f"OCR page {page['number']}: {len(text.strip())} chars")
-        # Add as a single block; structure builder will reflow
-        page = {**page, "raw_blocks": page.get("raw_blocks", []) + [{
-            "type": "text",
-            "text": text,
-            "bbox": [0, 0, page["width"], page["height"]],
-            "spans": [{"text": text, "size": 10, "font": "OCR", "flags": 0, "bbox": [0,0,page["width"], page["height"]]}]
-        }]} 
-        new_pages.append(page)
-    return new_pages
+        a = max(0.0, b[2] - b[0]) * max(0.0, b[3] - b[1])
+        total += a
+        largest = max(largest, a)
+    return min(1.0, total / area), min(1.0, largest / area)
+
+
+def classify_page(page: Dict) -> Dict[str, Any]:
+    """Decide whether a raw page needs OCR, from data extraction already has.
+
+    Looks at the glyph count of the native text layer, the share of the page
+    covered by text blocks and by images, and whether one image spans the whole
+    page. Returns ``{"needed", "reason", "glyphs", "text_coverage",
+    "image_coverage"}``; reasons are "no-text", "full-page-image",
+    "image-dominant" and "native-text".
+    """
+    blocks = text_blocks(page)
+    glyphs = sum(len("".join(b.text.split())) for b in blocks)
+    area = max(1.0, (page.get("width") or 0) * (page.get("height") or 0))
+    text_cov, _ = _coverage((b.bbox for b in blocks if "".join(b.text.split())), area)
+    image_cov, largest = _coverage((img.get("bbox") for img in page.get("images", [])), area)
+
+    if glyphs == 0:
+        reason = "no-text"
+    elif glyphs < MIN_GLYPHS and largest >= FULL_PAGE_IMAGE:
+        reason = "full-page-image"
+    elif glyphs < MIN_GLYPHS and image_cov >= IMAGE_DOMINANT and image_cov > text_cov:
+        reason = "image-dominant"
+    else:
+        reason = "native-text"
+    return {
+        "needed": reason != "native-text",
+        "reason": reason,
+        "glyphs": glyphs,
+        "text_coverage": round(text_cov, 3),
+        "image_coverage": round(image_cov, 3),
+    }
+
+
+def ocr_decision(page: Dict, mode: str = "if-needed", dpi: int = 300, adaptive_dpi: bool = True) -> Optional[Dict[str, Any]]:
+    """The ``classify_page`` decision for ``mode`` plus the rendering DPI if OCR is needed; None for "never"."""
+    if mode == "never":
+        return None
+    decision = classify_page(page)
+    if mode == "always":
+        decision = {**decision, "needed": True, "reason": "forced"}
+    if decision["needed"]:
+        decision["dpi"] = choose_dpi(page, dpi) if adaptive_dpi else dpi
+    return decision
+
+
+# Rendered glyphs this tall (pixels) sit well inside tesseract's accuracy range
+TARGET_GLYPH_PX = 32
+MIN_DPI = 150
+# Upper bound on rendered pixels per page (a letter page at 300 DPI is ~8.4M)
+MAX_PIXELS = 9_000_000
+# 8-bit gray to 1-bit threshold table
+_MONO = [0] * 128 + [255] * 128
+
+
+def choose_dpi(page: Dict, max_dpi: int = 300) -> int:
+    """Rendering DPI for one page, at most ``max_dpi``.
+
+    A page that is one big scan is rendered at the scan's own resolution, since
+    going above it adds pixels but no detail. Otherwise the median native glyph
+    size, when there is a text layer, sets the DPI that makes glyphs about
+    ``TARGET_GLYPH_PX`` tall. Oversized pages are capped at ``MAX_PIXELS``.
+    """
+    w, h = page.get("width") or 612, page.get("height") or 792
+    dpi = float(max_dpi)
+    scans = [img for img in page.get("images", []) if img.get("bbox") and img.get("width")]
+    scan = max(scans, key=lambda img: (img["bbox"][2] - img["bbox"][0]) * (img["bbox"][3] - img["bbox"][1]), default=None)
+    if scan is not None and (scan["bbox"][2] - scan["bbox"][0]) * (scan["bbox"][3] - scan["bbox"][1]) >= FULL_PAGE_IMAGE * w * h:
+        dpi = scan["width"] * 72 / max(1.0, scan["bbox"][2] - scan["bbox"][0])
+    else:
+        sizes = [sz for b in text_blocks(page) for sz in b.sizes if sz]
+        if sizes:
+            dpi = TARGET_GLYPH_PX * 72 / statistics.median(sizes)
+    cap = 72 * math.sqrt(MAX_PIXELS / (w * h))
+    return int(min(max(dpi, MIN_DPI), max_dpi, cap))
+
+
+def render_page(session: DocumentSession, number: int, dpi: int = 300, color: str = "rgb", clip: Optional[Tuple[float, float, float, float]] = None) -> Image.Image:
+    """Render 1-based page ``number`` (or its ``clip`` rectangle) to a PIL image.
+
+    ``color`` is "rgb", "gray" or "mono" (1-bit). Gray and mono images share the
+    pixmap's buffer instead of copying it.
+    """
+    p = session.load_page(number - 1)
+    mat = fitz.Matrix(dpi/72, dpi/72)
+    if color == "rgb":
+        pix = p.get_pixmap(matrix=mat, clip=clip, alpha=False)
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples_mv)
+    if color not in {"gray", "mono"}:
+        raise ValueError(f"Unknown OCR color mode: {color!r}")
+    pix = p.get_pixmap(matrix=mat, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+    # The image borrows the pixmap's memory and keeps the pixmap alive. It gets a
+    # derived view so the pixmap can still release its own view when collected.
+    img = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv[:], "raw", "L", pix.stride, 1)
+    img.pixmap = pix
+    return img.point(_MONO, "1") if color == "mono" else img
+
+
+# Columns of tesseract's TSV output that are not integers (pytesseract's DICT shape)
+_TSV_TYPES = {"text": str, "conf": float}
+# Header the tesseract CLI writes before the rows (the API's GetTSVText returns rows only)
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+def parse_tsv(text: str) -> Dict[str, List[Any]]:
+    """Tesseract TSV output as columns, like ``pytesseract.image_to_data(output_type=DICT)``."""
+    lines = text.splitlines()
+    if not lines:
+        return {}
+    header = lines[0].split("\t")
+    data: Dict[str, List[Any]] = {h: [] for h in header}
+    for line in lines[1:]:
+        cells = line.split("\t")
+        if len(cells) < len(header):
+            cells += [""] * (len(header) - len(cells))
+        for h, cell in zip(header, cells):
+            data[h].append(cell if h == "text" else _TSV_TYPES.get(h, int)(cell or 0))
+    return data
+
+
+def encode_image(img: Image.Image) -> bytes:
+    """Uncompressed PNM (PBM/PGM/PPM by mode) bytes of an image, for tesseract's stdin."""
+    buf = io.BytesIO()
+    img.save(buf, "PPM")
+    return buf.getvalue()
+
+
+class OcrBackend(ABC):
+    """Runs tesseract on an image and returns its ``image_to_data`` columns.
+
+    Backends are shared by every parse in the process and called from several
+    threads at once when ``ocr_workers`` > 1.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def image_to_data(self, img: Image.Image) -> Dict[str, List[Any]]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractBackend(OcrBackend):
+    """pytesseract: one tesseract process per image, which writes the image to a temp file and reloads the model.
+
+    The process inherits this process's environment as is; with ``ocr_workers``
+    > 1, set ``OMP_THREAD_LIMIT=1`` there to keep each tesseract single-threaded.
+    """
+
+    name = "pytesseract"
+
+    def image_to_data(self, img: Image.Image) -> Dict[str, List[Any]]:
+        return pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+
+
+class CliBackend(OcrBackend):
+    """One tesseract process per image, fed the image on stdin; no temp files, but the model still loads per image."""
+
+    name = "cli"
+
+    def image_to_data(self, img: Image.Image) -> Dict[str, List[Any]]:
+        # Tesseract is multithreaded by default; with several engines running that only oversubscribes the CPU
+        env = dict(os.environ)
+        env.setdefault("OMP_THREAD_LIMIT", "1")
+        proc = subprocess.run([pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "tsv"], input=encode_image(img), capture_output=True, env=env)
+        if proc.returncode != 0:
+            raise RuntimeError(f"tesseract exited with {proc.returncode}: {proc.stderr.decode('utf-8', 'replace').strip()}")
+        return parse_tsv(proc.stdout.decode("utf-8", "replace"))
+
+
+class TesserocrBackend(OcrBackend):
+    """Tesseract in this process through tesserocr, with the language model loaded once.
+
+    Each engine instance serves one image at a time, so engines are pooled: a
+    caller takes an idle one or starts a new one, and returns it afterwards.
+    The pool grows to the number of concurrent callers and lives as long as the
+    backend. Images are passed from memory. ``lang`` and other keyword
+    arguments (``path``, ``psm``, ``oem``, ...) go to ``tesserocr.PyTessBaseAPI``.
+    Tesseract reads ``OMP_THREAD_LIMIT`` when the library loads, so to keep
+    pooled engines single-threaded, set it to 1 before importing pdfparser.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng", **api_args: Any):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr package not installed. Install with `pip install pdfparser[tesserocr]`. ")
+        self.api_args = {"lang": lang, **api_args}
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _engine(self) -> Iterator[Any]:
+        with self._lock:
+            api = self._idle.pop() if self._idle else None
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(**self.api_args)
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with self._lock:
+                self._idle.append(api)
+
+    def image_to_data(self, img: Image.Image) -> Dict[str, List[Any]]:
+        with self._engine() as api:
+            api.SetImage(img)
+            rows = api.GetTSVText(0)
+        return parse_tsv(f"{TSV_HEADER}\n{rows}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for api in idle:
+            api.End()
+
+
+BACKENDS = {"tesserocr": TesserocrBackend, "cli": CliBackend, "pytesseract": PytesseractBackend}
+# What recognize and friends accept as a backend: a BACKENDS name, "auto", or an instance
+OcrBackendSpec = Union[str, OcrBackend, None]
+
+# One instance per backend name, kept for the life of the process so engines persist across parses
+_backends: Dict[str, OcrBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(backend: OcrBackendSpec = None) -> OcrBackend:
+    """The shared backend for a name; "auto" (or None) is tesserocr when installed, else pytesseract."""
+    if isinstance(backend, OcrBackend):
+        return backend
+    name = backend or "auto"
+    if name == "auto":
+        name = "tesserocr" if tesserocr is not None else "pytesseract"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name!r}")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def recognize(img: Image.Image, scale: float = 1.0, origin: Tuple[float, float] = (0.0, 0.0), backend: OcrBackendSpec = None) -> Tuple[List[RawBlock], float]:
+    """Run tesseract on an image; returns ``(raw_blocks, seconds)``.
+
+    ``scale`` converts image pixels to PDF points (``72 / dpi``) and ``origin`` is
+    the image's top-left corner on the page, in points. ``backend`` picks the
+    OCR engine (see ``get_backend``).
+    """
+    t0 = time.perf_counter()
+    data = get_backend(backend).image_to_data(img)
+    return ocr_blocks(data, scale, origin), time.perf_counter() - t0
+
+
+def recognize_all(inputs: List[Tuple[Image.Image, float, Tuple[float, float]]], backend: OcrBackendSpec = None) -> Tuple[List[RawBlock], float]:
+    """``recognize`` each ``(image, scale, origin)`` of one page; returns all blocks and total seconds."""
+    blocks: List[RawBlock] = []
+    secs = 0.0
+    for img, scale, origin in inputs:
+        b, t = recognize(img, scale, origin, backend=backend)
+        blocks.extend(b)
+        secs += t
+    return blocks, secs
+
+
+def ocr_blocks(data: Dict[str, List[Any]], scale: float = 1.0, origin: Tuple[float, float] = (0.0, 0.0)) -> List[RawBlock]:
+    """Group tesseract ``image_to_data`` words into lines and paragraphs.
+
+    Each paragraph becomes a text block shaped like extracted ones: one span per
+    line, with the font size estimated from the line height, so OCRed pages go
+    through the same heading heuristics as native text.
+    """
+    ox, oy = origin
+    lines: Dict[Tuple[int, int, int], List[Tuple[str, List[float]]]] = {}
+    for k, word in enumerate(data.get("text", [])):
+        if data["level"][k] != 5 or not (word or "").strip():
+            continue
+        x, y, w, h = data["left"][k], data["top"][k], data["width"][k], data["height"][k]
+        key = (data["block_num"][k], data["par_num"][k], data["line_num"][k])
+        lines.setdefault(key, []).append((word, [ox + x * scale, oy + y * scale, ox + (x + w) * scale, oy + (y + h) * scale]))
+
+    blocks: Dict[Tuple[int, int], RawBlock] = {}
+    for (block_num, par_num, _), words in lines.items():
+        text = " ".join(w for w, _ in words)
+        bbox = _union([b for _, b in words])
+        blk = blocks.get((block_num, par_num))
+        if blk is None:
+            blk = blocks[(block_num, par_num)] = RawBlock("", bbox)
+        blk.add_span(text, round(bbox[3] - bbox[1], 1), "OCR", 0, bbox)
+        blk.text = f"{blk.text}\n{text}" if blk.text else text
+        blk.bbox = _union([blk.bbox, bbox])
+    return list(blocks.values())
+
+
+def _union(boxes: List[List[float]]) -> List[float]:
+    return [min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)]
+
+
+def with_ocr_blocks(page: Dict, blocks: List[RawBlock]) -> Dict:
+    out = {**page, "raw_blocks": page.get("raw_blocks", []) + blocks}
+    if "fonts" in page:
+        out["fonts"] = page_fonts(page).update(FontStats.from_blocks(blocks)).to_list()
+    return out
+
+
+def _log_page(verbose: bool, page: Dict, blocks: List[RawBlock], render_s: float, ocr_s: float):
+    if verbose:
+        chars = sum(len(b.text) for b in blocks)
+        dpi = page.get("ocr", {}).get("dpi")
+        print(f"OCR page {page['number']}: {chars} chars in {len(blocks)} blocks at {dpi} DPI (render {render_s:.2f}s, ocr {ocr_s:.2f}s)")
+
+
+def image_regions(page: Dict) -> List[Tuple[float, float, float, float]]:
+    """Distinct image placements on the page, clipped to it."""
+    w, h = page.get("width") or 0, page.get("height") or 0
+    out = []
+    for img in page.get("images", []):
+        b = img.get("bbox")
+        if not b:
+            continue
+        r = (max(0.0, b[0]), max(0.0, b[1]), min(w, b[2]), min(h, b[3]))
+        if r[2] > r[0] and r[3] > r[1] and r not in out:
+            out.append(r)
+    return out
+
+
+def ocr_clips(page: Dict, regions: bool = False) -> List[Optional[Tuple[float, float, float, float]]]:
+    """The page areas to recognize: ``[None]`` for the whole page, else its image regions.
+
+    With ``regions``, pages that have a native text layer only get their image
+    areas (possibly none); other pages are recognized whole.
+    """
+    if regions and (page.get("ocr") or classify_page(page))["glyphs"]:
+        return image_regions(page)
+    return [None]
+
+
+def ocr_inputs(session: DocumentSession, page: Dict, dpi: int = 300, color: str = "gray", regions: bool = False) -> List[Tuple[Image.Image, float, Tuple[float, float]]]:
+    """Render what to recognize on one page (see ``ocr_clips``) as ``[(image, scale, origin)]``."""
+    clips = ocr_clips(page, regions)
+    if clips != [None] and "ocr" in page:
+        page["ocr"]["regions"] = len(clips)
+    return [(render_page(session, page["number"], dpi, color=color, clip=clip), 72 / dpi, (clip[0], clip[1]) if clip else (0.0, 0.0)) for clip in clips]
+
+
+def ocr_page(session: DocumentSession, page: Dict, dpi: int = 300, color: str = "gray", regions: bool = False, backend: OcrBackendSpec = None) -> Tuple[List[RawBlock], float, float]:
+    """Render and OCR one page; returns ``(raw_blocks, render_seconds, ocr_seconds)``."""
+    t0 = time.perf_counter()
+    inputs = ocr_inputs(session, page, dpi, color=color, regions=regions)
+    render_s = time.perf_counter() - t0
+    blocks, ocr_s = recognize_all(inputs, backend=backend)
+    return blocks, render_s, ocr_s
+
+
+def iter_ocr_pages(session: DocumentSession, pages: Iterable[Dict], mode: str = "if-needed", dpi: int = 300, verbose: bool = False, workers: int = 1, cache: Optional[ParseCache] = None, stats: Optional[ParseStats] = None, color: str = "gray", adaptive_dpi: bool = True, regions: bool = False, backend: OcrBackendSpec = None) -> Iterator[Dict]:
+    """OCR pages that need it and yield all pages in their original order.
+
+    With ``workers`` > 1 the calling thread keeps rendering while up to ``workers``
+    threads recognize previously rendered pages. At most ``2 * workers``
+    rendered images are held at a time. With a ``cache``, OCR blocks are stored per
+    page, DPI and rendered areas and reused without rendering. ``stats`` receives per-page render
+    and recognition times and OCR page counts. Unless ``mode`` is "never", each
+    page records the ``classify_page`` decision under ``"ocr"``; "always" OCRs
+    every page regardless and records reason "forced".
+
+    Pages are rendered in ``color`` ("gray" by default); with ``adaptive_dpi`` the
+    DPI is picked per page by ``choose_dpi`` with ``dpi`` as the ceiling, and
+    recorded as ``ocr["dpi"]``. ``regions`` OCRs only the image areas of pages
+    that already have a text layer. ``backend`` is the OCR engine: "tesserocr"
+    keeps tesseract loaded in this process, "cli" runs a tesseract process per
+    image fed through stdin, "pytesseract" goes through temp files; "auto"
+    (default) is tesserocr when installed, else pytesseract. Cache entries
+    don't depend on the backend.
+    """
+    backend = get_backend(backend)
+
+    def page_dpi(page: Dict) -> int:
+        return page["ocr"]["dpi"]
+
+    def cache_key(page: Dict) -> str:
+        # Region clips come from the page's image list, which depends on the extraction profile
+        return cache.key("ocr", session.digest, page=page["number"], dpi=page_dpi(page), color=color, clips=ocr_clips(page, regions))
+
+    def todo(pages: Iterable[Dict]) -> Iterator[Tuple[Dict, bool]]:
+        # (page, needs recognition); cached OCR is merged here
+        for page in pages:
+            decision = ocr_decision(page, mode, dpi, adaptive_dpi)
+            if decision is None:
+                yield page, False
+                continue
+            page = {**page, "ocr": decision}
+            if not decision["needed"]:
+                yield page, False
+                continue
+            cached = cache.get(cache_key(page)) if cache is not None else None
+            if cached is None:
+                yield page, True
+                continue
+            if verbose:
+                print(f"OCR page {page['number']}: cached")
+            if stats is not None:
+                stats.count("ocr_pages_cached")
+            yield with_ocr_blocks(page, [RawBlock.from_dict(b) for b in cached]), False
+
+    def finish(page: Dict, blocks: List[RawBlock], render_s: float, ocr_s: float) -> Dict:
+        _log_page(verbose, page, blocks, render_s, ocr_s)
+        if stats is not None:
+            stats.page(page["number"], ocr_render_s=render_s, ocr_s=ocr_s)
+            stats.count("ocr_pages")
+        if cache is not None:
+            cache.put(cache_key(page), [b.to_dict() for b in blocks])
+        return with_ocr_blocks(page, blocks)
+
+    if workers <= 1:
+        for page, run in todo(pages):
+            yield finish(page, *ocr_page(session, page, page_dpi(page), color=color, regions=regions, backend=backend)) if run else page
+        return
+
+    def collect(item) -> Dict:
+        page, fut, render_s = item
+        if fut is None:
+            return page
+        blocks, ocr_s = fut.result()
+        return finish(page, blocks, render_s, ocr_s)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for page, run in todo(pages):
+            if run:
+                t0 = time.perf_counter()
+                inputs = ocr_inputs(session, page, page_dpi(page), color=color, regions=regions)
+                pending.append((page, pool.submit(recognize_all, inputs, backend), time.perf_counter() - t0))
+            else:
+                pending.append((page, None, 0.0))
+            # Emit finished pages from the front; block only when the window is full
+            while pending and (len(pending) > workers * 2 or pending[0][1] is None or pending[0][1].done()):
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+
+def ocr_pages_if_needed(pdf_path: PdfInput, pages: List[Dict], mode: str = "if-needed", dpi: int = 300, verbose: bool = False, workers: int = 1, session: Optional[DocumentSession] = None, cache: Optional[ParseCache] = None, compact: bool = False, stats: Optional[ParseStats] = None, color: str = "gray", adaptive_dpi: bool = True, regions: bool = False, backend: OcrBackendSpec = None) -> List[Dict]:
+    """OCR pages that need it. Pages come back in the ``types.Page`` dict shape unless ``compact``."""
+    if session is None:
+        with DocumentSession(pdf_path) as own:
+            return ocr_pages_if_needed(pdf_path, pages, mode=mode, dpi=dpi, verbose=verbose, workers=workers, session=own, cache=cache, compact=compact, stats=stats, color=color, adaptive_dpi=adaptive_dpi, regions=regions, backend=backend)
+    out = list(iter_ocr_pages(session, [compact_page(p) for p in pages], mode=mode, dpi=dpi, verbose=verbose, workers=workers, cache=cache, stats=stats, color=color, adaptive_dpi=adaptive_dpi, regions=regions, backend=backend))
+    return out if compact else pages_to_dicts(out)
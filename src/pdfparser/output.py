@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, TextIO
+import json
+
+
+def dump_kwargs(compact: bool = False) -> Dict[str, Any]:
+    if compact:
+        return {"ensure_ascii": False, "separators": (",", ":")}
+    return {"ensure_ascii": False, "indent": 2}
+
+
+def write_json(result: Dict[str, Any], fp: TextIO, compact: bool = False) -> None:
+    """Serialize a parse result straight to ``fp`` without building the whole string first."""
+    json.dump(result, fp, **dump_kwargs(compact))
+
+
+def document_items(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Split a full parse result into the ``iter_parse_pdf`` item sequence: pages, then a trailer.
+
+    The trailer holds meta and sections plus any other top-level sections (stats, fingerprints).
+    """
+    yield from result.get("pages", [])
+    yield {"meta": result.get("meta"), "sections": result.get("sections", []), **{k: v for k, v in result.items() if k not in {"meta", "pages", "sections"}}}
+
+
+def write_jsonl(items: Iterable[Dict[str, Any]], fp: TextIO) -> int:
+    """Write one compact JSON line per item as it arrives; returns the number of lines."""
+    n = 0
+    for item in items:
+        fp.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        fp.write("\n")
+        fp.flush()
+        n += 1
+    return n
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .source import PdfInput, PdfSource
+
+
+class DocumentSession:
+    """One open PDF shared by all pipeline stages.
+
+    Use as a context manager so the document is closed deterministically. Loaded
+    pages are kept in a small LRU cache, so a page that extraction just loaded
+    is not reloaded when OCR renders it. ``source`` is a
+    path or any in-memory/file-like input ``PdfSource`` takes; ``path`` is None
+    for the latter.
+    """
+
+    def __init__(self, source: PdfInput, cache_size: int = 32):
+        self.source = PdfSource(source)
+        self.path = self.source.path
+        self.doc = self.source.open()
+        self.cache_size = cache_size
+        self._pages: "OrderedDict[int, Any]" = OrderedDict()
+        self._digest: Optional[str] = None
+
+    def __enter__(self) -> "DocumentSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the input, computed on first use."""
+        if self._digest is None:
+            self._digest = self.source.digest()
+        return self._digest
+
+    def _remember(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def load_page(self, i: int):
+        """Return 0-based page ``i``, loading it at most once while it stays cached."""
+        page = self._pages.get(i)
+        if page is not None:
+            self._pages.move_to_end(i)
+            return page
+        return self._remember(self._pages, i, self.doc.load_page(i))
+
+    def get_text(self, i: int, option: str = "dict", flags: Optional[int] = None, **kwargs) -> Any:
+        """``page.get_text(option, flags=flags, **kwargs)`` on the cached page.
+
+        Results are not cached: each stage extracts a page once, and a "dict"
+        result with image blocks can be far larger than the page itself.
+        """
+        return self.load_page(i).get_text(option, flags=flags, **kwargs)
+
+    def release(self, i: int) -> None:
+        """Drop cached data for page ``i`` once no later stage needs it."""
+        self._pages.pop(i, None)
+
+    def close(self) -> None:
+        self._pages.clear()
+        if not self.doc.is_closed:
+            self.doc.close()
+        self.source.close()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Union
+import hashlib
+import io
+import mmap
+import os
+import fitz  # PyMuPDF
+
+from .cache import file_digest
+
+
+class SharedPdf(NamedTuple):
+    """A PDF held in a shared memory segment, as passed to worker processes."""
+    name: str
+    size: int
+
+
+# What parse_pdf and friends accept as a PDF
+PdfInput = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, mmap.mmap, BinaryIO, SharedPdf]
+
+
+class PdfSource:
+    """A PDF input, opened by PyMuPDF from a path or as an in-memory stream.
+
+    Paths are opened by PyMuPDF itself. bytes, bytearray, memoryview and mmap
+    inputs are handed to PyMuPDF as a memoryview, without copying. File objects
+    backed by a file on disk are memory-mapped rather than read; ``io.BytesIO``
+    shares its buffer; other file-like objects are read once. The caller keeps
+    ownership of the objects it passes in; ``close`` only releases views and
+    mappings made here.
+    """
+
+    def __init__(self, src: PdfInput):
+        self.path: Optional[str] = None
+        self.data: Optional[memoryview] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        if isinstance(src, (str, os.PathLike)):
+            self.path = os.fspath(src)
+        elif isinstance(src, SharedPdf):
+            self._shm = shared_memory.SharedMemory(name=src.name)
+            self.data = self._shm.buf[:src.size]
+        elif isinstance(src, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.data = _byte_view(src)
+        elif isinstance(src, io.BytesIO):
+            self.data = src.getbuffer()
+        elif hasattr(src, "read"):
+            self._mmap = _map_file(src)
+            self.data = memoryview(self._mmap) if self._mmap is not None else memoryview(src.read())
+        else:
+            raise TypeError(f"Unsupported PDF input: {type(src).__name__}")
+
+    @property
+    def name(self) -> str:
+        """The path, or ``<memory>`` for in-memory input (for messages)."""
+        return self.path if self.path is not None else "<memory>"
+
+    def open(self):
+        if self.path is not None:
+            return fitz.open(self.path)
+        return fitz.open(stream=self.data, filetype="pdf")
+
+    def digest(self) -> str:
+        """SHA-256 of the PDF bytes."""
+        if self.path is not None:
+            return file_digest(self.path)
+        return hashlib.sha256(self.data).hexdigest()
+
+    @contextmanager
+    def shared(self) -> Iterator[Union[str, SharedPdf]]:
+        """A picklable reference that worker processes open with ``PdfSource``.
+
+        That is the path for files. In-memory data is copied once into a shared
+        memory segment, which every worker maps instead of receiving its own
+        copy; the segment is removed on exit.
+        """
+        if self.path is not None:
+            yield self.path
+            return
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(self.data)))
+        try:
+            shm.buf[:len(self.data)] = self.data
+            yield SharedPdf(shm.name, len(self.data))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self) -> None:
+        # Views go first: mappings can't be closed while a view exports them
+        if self.data is not None:
+            self.data.release()
+            self.data = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def _byte_view(buf) -> memoryview:
+    view = memoryview(buf)
+    return view if view.format == "B" and view.ndim == 1 else view.cast("B")
+
+
+def _map_file(f: BinaryIO) -> Optional[mmap.mmap]:
+    """Read-only mapping of the whole file behind ``f``, or None if it isn't a mappable file."""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
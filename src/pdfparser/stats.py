@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+import os
+import threading
+import time
+
+# Called with one event dict per measurement:
+#   {"type": "stage", "name": ..., "wall_s": ..., "cpu_s": ...}
+#   {"type": "page", "number": ..., <timing>: seconds, ...}
+#   {"type": "count", "name": ..., "value": ...}
+StatsHook = Callable[[Dict[str, Any]], None]
+
+
+def cpu_time() -> float:
+    """CPU seconds of this process plus its finished child processes (workers, tesseract)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class ParseStats:
+    """Collects per-stage and per-page timings and counters for one parse.
+
+    Every measurement is also passed to ``hook`` as it happens, so it can be
+    exported to a metrics system without waiting for the parse to finish.
+    """
+
+    def __init__(self, hook: Optional[StatsHook] = None):
+        self.hook = hook
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.pages: Dict[int, Dict[str, float]] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _emit(self, event: Dict[str, Any]):
+        if self.hook is not None:
+            self.hook(event)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall0, cpu0 = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, cpu_time() - cpu0
+            with self._lock:
+                entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+                entry["wall_s"] += wall
+                entry["cpu_s"] += cpu
+            self._emit({"type": "stage", "name": name, "wall_s": wall, "cpu_s": cpu})
+
+    def page(self, number: int, **timings: float):
+        with self._lock:
+            entry = self.pages.setdefault(number, {})
+            for k, v in timings.items():
+                entry[k] = entry.get(k, 0.0) + v
+        self._emit({"type": "page", "number": number, **timings})
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+        self._emit({"type": "count", "name": name, "value": value})
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "pages": [{"number": n, **self.pages[n]} for n in sorted(self.pages)],
+                "counters": dict(self.counters),
+            }
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """Render a ``stats`` section as a plain-text summary table."""
+    lines = [f"{'stage':<12} {'wall s':>9} {'cpu s':>9}"]
+    for name, t in stats.get("stages", {}).items():
+        lines.append(f"{name:<12} {t['wall_s']:>9.3f} {t['cpu_s']:>9.3f}")
+    pages = stats.get("pages", [])
+    if pages:
+        keys = sorted({k for p in pages for k in p if k != "number"})
+        lines.append("")
+        lines.append(f"{'per page':<12} {'total s':>9} {'max s':>9} {'max page':>9}")
+        for k in keys:
+            vals = [(p.get(k, 0.0), p["number"]) for p in pages if k in p]
+            top = max(vals)
+            lines.append(f"{k:<12} {sum(v for v, _ in vals):>9.3f} {top[0]:>9.3f} {top[1]:>9}")
+    counters = stats.get("counters", {})
+    if counters:
+        lines.append("")
+        for name in sorted(counters):
+            lines.append(f"{name:<24} {counters[name]:>12,}")
+    return "\n".join(lines)
@@ -1,197 +1,197 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from typing import Any, Dict, List, Optional
 import math
 
+from .fonts import FontStats, document_fonts, page_fonts
+from .model import text_blocks
+
+
+def structure_page(page: Dict, fonts: Optional[FontStats] = None) -> Dict[str, Any]:
+    """Classify one raw page's text blocks into headings/paragraphs (the ``PageOut`` shape).
+
+    Heading levels come from ``fonts``, the document's font histogram; without
+    it the page's own histogram is used.
+    """
+    if fonts is None:
+        fonts = page_fonts(page)
+    blocks = []
+    for rb in text_blocks(page):
+        text = " ".join(rb.text.split())
+        if not text:
+            continue
+        level = fonts.block_level(rb, text)
+        if level is not None:
+            blocks.append({
+                "type": "heading",
+                "level": level,
+                "text": text,
+                "bbox": rb.bbox,
+            })
+        else:
+            blocks.append({
+                "type": "paragraph",
+                "text": text,
+                "bbox": rb.bbox,
+            })
+    out = {
+        "number": page["number"],
+        "width": page["width"],
+        "height": page["height"],
+        "blocks": blocks,
+        "images": page.get("images", []),
+        "links": page.get("links", []),
+    }
+    if "ocr" in page:
+        out["ocr"] = page["ocr"]
+    return out
 
-def median(nums: List[float]) -> float:
-    s = sorted(nums)
-    n = len(s)
-    if n == 0:
-        return 0.0
-    if n % 2 == 1:
-        return float(s[n//2])
-    return float((s[n//2 - 1] + s[n//2]) / 2)
-
-
-def guess_heading_level(size: float, size_median: float) -> Optional[int]:
-    # Simple heuristic: larger than median -> heading; scale to levels
-    if size >= size_median * 1.6:
-        return 1
-    if size >= size_median * 1.35:
-        return 2
-    if size >= size_median * 1.2:
-        return 3
-    return None
-
-
-def build_structure(pages: List[Dict], verbose: bool = False, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    structured_pages = []
-    for page in pages:
-        blocks = []
-        sizes = []
-        for rb in page.get("raw_blocks", []):
-            if rb.get("type") != "text":
-                continue
-            spans = rb.get("spans", [])
-            sizes.extend([s.get("size") for s in spans if s.get("size")])
-        size_median = median([s for s in sizes if isinstance(s, (int, float))]) or 10.0
-
-        for rb in page.get("raw_blocks", []):
-            if rb.get("type") != "text":
-                continue
-            text = " ".join(rb.get("text", "").split())
-            if not text:
-                continue
-            level = None
-            # derive a representative size
-            span_sizes = [s.get("size") for s in rb.get("spans", []) if s.get("size")]
-            rep_size = median([s for s in span_sizes if isinstance(s, (int, float))]) or size_median
-            level = guess_heading_level(rep_size, size_median)
-
-            if level is not None:
-                blocks.append({
-                    "type": "heading",
-                    "level": level,
-                    "text": text,
-                    "bbox": rb.get("bbox"),
-                })
-            else:
-                blocks.append({
-                    "type": "paragraph",
-                    "text": text,
-                    "bbox": rb.get("bbox"),
-                })
-        structured_pages.append({
-            "number": page["number"],
-            "width": page["width"],
-            "height": page["height"],
-            "blocks": blocks,
-            "images": page.get("images", []),
-            "links": page.get("links", []),
-        })
 
+def build_meta(meta: Optional[Dict[str, Any]], page_count: int) -> Dict[str, Any]:
     out_meta = {
         "title": None,
-        "pages": len(structured_pages),
+        "pages": page_count,
     }
     if isinstance(meta, dict):
         out_meta.update(meta)
+    return out_meta
+
+
+def build_structure(pages: List[Dict], verbose: bool = False, meta: Optional[Dict[str, Any]] = None, section_refs: bool = False) -> Dict[str, Any]:
+    fonts = document_fonts(pages)
+    if verbose:
+        print(f"Font styles: body {fonts.body_size()}pt, {len(fonts.heading_levels())} heading styles")
+    structured_pages = [structure_page(page, fonts) for page in pages]
+    out_meta = build_meta(meta, len(structured_pages))
+    sections = build_sections(structured_pages, out_meta.get("toc") or [], refs=section_refs)
+    return {"meta": out_meta, "pages": structured_pages, "sections": sections}
+
+
+def new_section(title: str, level: int, page_start: int) -> Dict[str, Any]:
+    return {
+        "title": title,
+        "level": level,
+        "page_start": page_start,
+        "page_end": None,
+        "children": [],
+        "blocks": [],
+        "images": [],
+        "links": [],
+    }
+
 
-    # Build sections tree
-    def new_node(title: str, level: int, page_start: int) -> Dict[str, Any]:
-        return {
-            "title": title,
-            "level": level,
-            "page_start": page_start,
-            "page_end": None,
-            "children": [],
-            "blocks": [],
-            "images": [],
-            "links": [],
-        }
+def build_sections(structured_pages: List[Dict[str, Any]], toc: List[Dict[str, Any]], refs: bool = False) -> List[Dict[str, Any]]:
+    """Build the sections tree from the ToC (or headings when there is none) and attach page content.
 
+    With ``refs`` the section's blocks, images and links are ``{"page", "index"}``
+    references into ``pages`` instead of copies of the items.
+    """
     sections: List[Dict[str, Any]] = []
     stack: List[Dict[str, Any]] = []
 
-    toc = (out_meta or {}).get("toc") or []
+    def push(node: Dict[str, Any]):
+        while stack and stack[-1]["level"] >= node["level"]:
+            stack.pop()
+        if stack:
+            stack[-1]["children"].append(node)
+        else:
+            sections.append(node)
+        stack.append(node)
+
     if toc:
         # Use ToC for hierarchy; attach content by page ranges later
         for item in toc:
-            title = item.get("title") or ""
-            level = int(item.get("level") or 1)
-            page = int(item.get("page") or 1)
-            node = new_node(title, level, page)
-            # place in hierarchy
-            while stack and stack[-1]["level"] >= level:
-                stack.pop()
-            if stack:
-                stack[-1]["children"].append(node)
-            else:
-                sections.append(node)
-            stack.append(node)
-
-        # Fill page_end by next section start - 1
-        flat: List[Dict[str, Any]] = []
-        def walk(n: Dict[str, Any]):
-            flat.append(n)
-            for c in n["children"]:
-                walk(c)
-        for root in sections:
-            walk(root)
-        flat_sorted = sorted(flat, key=lambda n: (n["page_start"], n["level"]))
-        for i, n in enumerate(flat_sorted):
-            # find next node with same or higher level
-            end_page = structured_pages[-1]["number"] if structured_pages else n["page_start"]
-            for m in flat_sorted[i+1:]:
-                if m["level"] <= n["level"]:
-                    end_page = m["page_start"] - 1
-                    break
-            n["page_end"] = max(n["page_start"], end_page)
-
+            push(new_section(item.get("title") or "", int(item.get("level") or 1), int(item.get("page") or 1)))
     else:
         # Infer sections from headings
         for page in structured_pages:
             for blk in page.get("blocks", []):
                 if blk.get("type") == "heading":
-                    level = int(blk.get("level") or 1)
-                    node = new_node(blk.get("text", ""), level, page["number"])
-                    while stack and stack[-1]["level"] >= level:
-                        stack.pop()
-                    if stack:
-                        stack[-1]["children"].append(node)
-                    else:
-                        sections.append(node)
-                    stack.append(node)
-
-        # Assign page_end similarly
-        flat: List[Dict[str, Any]] = []
-        def walk2(n: Dict[str, Any]):
-            flat.append(n)
-            for c in n["children"]:
-                walk2(c)
-        for root in sections:
-            walk2(root)
-        flat_sorted = sorted(flat, key=lambda n: (n["page_start"], n["level"]))
-        for i, n in enumerate(flat_sorted):
-            end_page = structured_pages[-1]["number"] if structured_pages else n["page_start"]
-            for m in flat_sorted[i+1:]:
-                if m["level"] <= n["level"]:
-                    end_page = m["page_start"] - 1
-                    break
-            n["page_end"] = max(n["page_start"], end_page)
-
-    # Attach content to sections by page range
-    def assign_content():
-        if not sections:
-            return
-        # Utility to add block/image/link to the deepest matching section containing this page
-        def place(page_num: int, kind: str, item: Dict[str, Any]):
-            def place_in(nodes: List[Dict[str, Any]]):
-                for node in nodes[::-1]:
-                    if node["page_start"] <= page_num <= (node["page_end"] or page_num):
-                        if node["children"]:
-                            placed = place_in(node["children"])
-                            if placed:
-                                return True
-                        if kind == "block":
-                            node["blocks"].append(item)
-                        elif kind == "image":
-                            node["images"].append(item)
-                        elif kind == "link":
-                            node["links"].append(item)
-                        return True
-                return False
-            place_in(sections)
-
-        for page in structured_pages:
-            for blk in page.get("blocks", []):
-                place(page["number"], "block", {"page": page["number"], "block": blk})
-            for img in page.get("images", []):
-                place(page["number"], "image", img)
-            for lnk in page.get("links", []):
-                place(page["number"], "link", lnk)
-
-    assign_content()
+                    push(new_section(blk.get("text", ""), int(blk.get("level") or 1), page["number"]))
+
+    if not sections:
+        return sections
+    fill_page_ends(sections, structured_pages[-1]["number"] if structured_pages else None)
+
+    # Attach content to the deepest section containing each page
+    targets = section_targets(sections, [page["number"] for page in structured_pages])
+    for page in structured_pages:
+        node = targets.get(page["number"])
+        if node is None:
+            continue
+        n = page["number"]
+        if refs:
+            for kind in ("blocks", "images", "links"):
+                node[kind].extend({"page": n, "index": k} for k in range(len(page.get(kind, []))))
+            continue
+        for blk in page.get("blocks", []):
+            node["blocks"].append({"page": n, "block": blk})
+        node["images"].extend(page.get("images", []))
+        node["links"].extend(page.get("links", []))
+    return sections
+
+
+def fill_page_ends(sections: List[Dict[str, Any]], last_page: Optional[int]) -> None:
+    """Set each node's page_end to the page before the next node of the same or higher level.
+
+    Nodes are ordered by (page_start, level); a monotonic stack scanned from the
+    right finds every node's next same-or-higher-level node in one pass.
+    """
+    flat: List[Dict[str, Any]] = []
+    todo = list(reversed(sections))
+    while todo:
+        n = todo.pop()
+        flat.append(n)
+        todo.extend(reversed(n["children"]))
+    flat_sorted = sorted(flat, key=lambda n: (n["page_start"], n["level"]))
+
+    following: List[Dict[str, Any]] = []
+    for n in reversed(flat_sorted):
+        while following and following[-1]["level"] > n["level"]:
+            following.pop()
+        end_page = following[-1]["page_start"] - 1 if following else (last_page if last_page is not None else n["page_start"])
+        n["page_end"] = max(n["page_start"], end_page)
+        following.append(n)
+
+
+def section_targets(sections: List[Dict[str, Any]], page_numbers: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Map each page number to the deepest section whose page range contains it.
+
+    Among overlapping siblings the last one wins. Each sibling list claims pages
+    from a sorted candidate list, skipping already claimed ones with a
+    path-compressed "next unclaimed" array, so every page is visited once per
+    tree level instead of once per node.
+    """
+    targets: Dict[int, Dict[str, Any]] = {}
+
+    def claim(nodes: List[Dict[str, Any]], pages: List[int]):
+        nxt = list(range(len(pages) + 1))
+
+        def find(j: int) -> int:
+            root = j
+            while nxt[root] != root:
+                root = nxt[root]
+            while nxt[j] != root:
+                nxt[j], j = root, nxt[j]
+            return root
+
+        for node in reversed(nodes):
+            # An unset (or 0, from unresolved ToC entries) page_end leaves the range open-ended
+            end = node["page_end"] or math.inf
+            lo, hi = bisect_left(pages, node["page_start"]), bisect_right(pages, end)
+            mine = []
+            j = find(lo)
+            while j < hi:
+                mine.append(pages[j])
+                nxt[j] = j + 1
+                j = find(j + 1)
+            if not mine:
+                continue
+            for p in mine:
+                targets[p] = node
+            if node["children"]:
+                claim(node["children"], mine)
 
-    return {"meta": out_meta, "pages": structured_pages, "sections": sections}
+    claim(sections, sorted(set(page_numbers)))
+    return targets
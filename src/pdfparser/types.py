@@ -18,14 +18,18 @@ class ImageItem(TypedDict, total=False):
     id: str
     xref: int
     bbox: Optional[List[float]]
+    width: int
+    height: int
     path: Optional[str]
     alt: Optional[str]
 
+# Public shape of extract_pages() output; inside the pipeline text blocks are model.RawBlock
 class Page(TypedDict, total=False):
     number: int
     width: float
     height: float
     raw_blocks: List[TextBlock]
+    fonts: List[List[float]]  # [size, bold, chars] per font style, see fonts.FontStats
     images: List[ImageItem]
     links: List["LinkItem"]
 
@@ -35,6 +39,14 @@ class BlockOut(TypedDict, total=False):
     text: str
     bbox: List[float]
 
+class OcrDecision(TypedDict, total=False):
+    # reason: "no-text" | "full-page-image" | "image-dominant" | "native-text" | "forced"
+    needed: bool
+    reason: str
+    glyphs: int
+    text_coverage: float
+    image_coverage: float
+
 class PageOut(TypedDict, total=False):
     number: int
     width: float
@@ -42,10 +54,31 @@ class PageOut(TypedDict, total=False):
     blocks: List[BlockOut]
     images: List[ImageItem]
     links: List["LinkItem"]
+    ocr: OcrDecision  # absent with ocr_mode="never"
+
+class StatsOut(TypedDict, total=False):
+    # Present with stats=True; stages map to {"wall_s", "cpu_s"}, pages hold per-page seconds
+    stages: Dict[str, Dict[str, float]]
+    pages: List[Dict[str, float]]
+    counters: Dict[str, float]
+
+class Fingerprints(TypedDict, total=False):
+    # With fingerprints=True: digest of the output-affecting options and one content digest per page in `pages`
+    options: str
+    pages: List[str]
+    fonts: List[List[List[float]]]  # each page's font histogram, so heading styles can be recomputed
 
 class DocOut(TypedDict, total=False):
     meta: Dict[str, Any]
     pages: List[PageOut]
+    stats: StatsOut
+    fingerprints: Fingerprints
+
+class DocTrailer(TypedDict, total=False):
+    # Final item yielded by iter_parse_pdf after all pages
+    meta: Dict[str, Any]
+    sections: List["SectionNode"]
+    stats: StatsOut
 
 class TocItem(TypedDict, total=False):
     level: int
@@ -62,6 +95,11 @@ class SectionBlock(TypedDict, total=False):
     page: int
     block: BlockOut
 
+class ItemRef(TypedDict, total=False):
+    # With section_refs, section blocks/images/links are references: item `index` of the page numbered `page`
+    page: int
+    index: int
+
 class SectionNode(TypedDict, total=False):
     title: str
     level: int
@@ -1,55 +1,442 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import json
 import os
+import random
+import threading
+import time
 
 try:
-    from openai import OpenAI  # type: ignore
+    from openai import AsyncOpenAI, OpenAI  # type: ignore
 except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
+    AsyncOpenAI = OpenAI = None  # type: ignore
+
+from .cache import ParseCache
+from .stats import ParseStats
+from .structure import build_sections
 
 PROMPT = (
-    "You are a document structure refinement assistant. Given a JSON with pages, blocks (headings/paragraphs), and images, improve heading levels, merge/split paragraphs if necessary, and add alt text for images. Return valid JSON in the same schema."
+    "You are a document structure refinement assistant. Given a JSON object with a \"pages\" array (a window of a larger document) holding blocks (headings/paragraphs) and images, improve heading levels, merge/split paragraphs if necessary, and add alt text for images. Return valid JSON with the same \"pages\" array, keeping every page's \"number\"."
 )
 
 
-def refine_with_vision(doc: Dict[str, Any], model: str = "gpt-4o-mini", verbose: bool = False) -> Dict[str, Any]:
+def make_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """OpenAI client from arguments or ``OPENAI_API_KEY`` / ``OPENAI_BASE_URL``."""
     if OpenAI is None:
         raise RuntimeError("openai package not installed. Install with `pip install pdfparser[vision]`. ")
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set")
+    return OpenAI(api_key=api_key, base_url=base_url or os.getenv("OPENAI_BASE_URL") or None)
 
-    client = OpenAI(api_key=api_key)
 
-    # For simplicity, we only send JSON text. Images already extracted paths could be summarized if needed.
-    import json
-    payload = json.dumps(doc)[:150000]  # guard size
+def make_async_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """``AsyncOpenAI`` client, configured like ``make_client``."""
+    if AsyncOpenAI is None:
+        raise RuntimeError("openai package not installed. Install with `pip install pdfparser[vision]`. ")
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY not set")
+    return AsyncOpenAI(api_key=api_key, base_url=base_url or os.getenv("OPENAI_BASE_URL") or None)
 
-    if verbose:
-        print(f"Sending {len(payload)} bytes to vision model {model}")
-
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": PROMPT},
-            {"role": "user", "content": payload},
-        ],
-        temperature=0.2,
-    )
-    txt = resp.choices[0].message.content or ""
-
-    # Attempt to parse JSON from the response; if it fails, return original doc
+
+# Image fields that point into one document rather than describe the image
+IMAGE_REF_FIELDS = ("id", "xref", "path")
+
+
+def normalize_window(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """A window as sent to the model and keyed in the cache.
+
+    Pages are numbered 1..n within the window and images lose their document
+    references, so the same pages at another position, in another window or in
+    another document make the same request. ``restore_window`` maps replies back.
+    """
+    out = []
+    for k, page in enumerate(pages, 1):
+        page = {**page, "number": k}
+        if "images" in page:
+            page["images"] = [{f: v for f, v in img.items() if f not in IMAGE_REF_FIELDS} for img in page["images"]]
+        out.append(page)
+    return out
+
+
+def restore_window(pages: List[Dict[str, Any]], refined: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Refined pages of ``normalize_window(pages)`` with the original page numbers and image references."""
+    out = []
+    for page, new in zip(pages, refined):
+        new = {**new, "number": page["number"]}
+        if "images" in page:
+            images = new.get("images")
+            if isinstance(images, list) and len(images) == len(page["images"]) and all(isinstance(img, dict) for img in images):
+                new["images"] = [{**orig, **{f: v for f, v in img.items() if f not in IMAGE_REF_FIELDS}} for orig, img in zip(page["images"], images)]
+            else:
+                new["images"] = page["images"]
+        out.append(new)
+    return out
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English JSON; only used to size chunks
+    return len(text) // 4 + 1
+
+
+def chunk_pages(pages: List[Dict[str, Any]], max_tokens: int = 8000) -> List[List[Dict[str, Any]]]:
+    """Split pages into consecutive windows whose JSON stays under ``max_tokens``.
+
+    A single page larger than the budget is sent on its own rather than cut.
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for page in pages:
+        cost = estimate_tokens(json.dumps(page, ensure_ascii=False))
+        if current and used + cost > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(page)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_json_reply(txt: str) -> Any:
+    # Some models wrap JSON in code fences
+    if "```" in txt:
+        txt = txt.split("```", 2)[1]
+        if txt.strip().startswith("json"):
+            txt = "\n".join(txt.splitlines()[1:])
+    return json.loads(txt)
+
+
+def merge_chunk(original: List[Dict[str, Any]], refined: Any) -> Optional[List[Dict[str, Any]]]:
+    """Refined pages in the original order, or None if the reply doesn't cover exactly these pages."""
+    if not isinstance(refined, dict) or not isinstance(refined.get("pages"), list):
+        return None
+    by_number = {p.get("number"): p for p in refined["pages"] if isinstance(p, dict)}
+    if set(by_number) != {p["number"] for p in original}:
+        return None
+    return [{**p, **by_number[p["number"]]} for p in original]
+
+
+def chunk_messages(pages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": PROMPT},
+        {"role": "user", "content": json.dumps({"pages": pages}, ensure_ascii=False)},
+    ]
+
+
+def retry_delay(attempt: int, backoff: float = 1.0) -> float:
+    # Exponential backoff with jitter
+    return backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+def chunk_reply(resp, pages: List[Dict[str, Any]], verbose: bool = False, stats: Optional[ParseStats] = None) -> Optional[List[Dict[str, Any]]]:
+    """Refined pages from a chat completion for ``pages``, or None if the reply can't be used."""
+    usage = getattr(resp, "usage", None)
+    if stats is not None and usage is not None:
+        stats.count("vision_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        stats.count("vision_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
     try:
-        import json
-        # Some models wrap JSON in code fences
-        if "```" in txt:
-            txt = txt.split("```", 2)[1]
-            if txt.strip().startswith("json"):
-                txt = "\n".join(txt.splitlines()[1:])
-        refined = json.loads(txt)
-        return refined
+        merged = merge_chunk(pages, parse_json_reply(resp.choices[0].message.content or ""))
     except Exception:
-        if verbose:
-            print("Failed to parse vision output; returning original doc")
+        merged = None
+    if merged is None and verbose:
+        print(f"Vision pages {pages[0]['number']}-{pages[-1]['number']}: unusable reply; keeping original pages")
+    return merged
+
+
+def refine_chunk(client, pages: List[Dict[str, Any]], model: str = "gpt-4o-mini", retries: int = 3, backoff: float = 1.0, verbose: bool = False, stats: Optional[ParseStats] = None) -> Optional[List[Dict[str, Any]]]:
+    """Send one window of pages, retrying failed calls with exponential backoff and jitter.
+
+    ``stats`` counts calls, retries and the token usage reported by the endpoint.
+    """
+    messages = chunk_messages(pages)
+    span = f"pages {pages[0]['number']}-{pages[-1]['number']}"
+    for attempt in range(retries + 1):
+        if stats is not None:
+            stats.count("vision_calls")
+        try:
+            resp = client.chat.completions.create(model=model, messages=messages, temperature=0.2)
+            break
+        except Exception as e:
+            if attempt == retries:
+                if verbose:
+                    print(f"Vision {span}: giving up after {retries + 1} attempts: {e}")
+                return None
+            delay = retry_delay(attempt, backoff)
+            if verbose:
+                print(f"Vision {span}: {e}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return chunk_reply(resp, pages, verbose=verbose, stats=stats)
+
+
+async def refine_chunk_async(client, pages: List[Dict[str, Any]], model: str = "gpt-4o-mini", retries: int = 3, backoff: float = 1.0, verbose: bool = False, stats: Optional[ParseStats] = None) -> Optional[List[Dict[str, Any]]]:
+    """``refine_chunk`` for an async client (``await client.chat.completions.create(...)``)."""
+    messages = chunk_messages(pages)
+    span = f"pages {pages[0]['number']}-{pages[-1]['number']}"
+    for attempt in range(retries + 1):
+        if stats is not None:
+            stats.count("vision_calls")
+        try:
+            resp = await client.chat.completions.create(model=model, messages=messages, temperature=0.2)
+            break
+        except Exception as e:
+            if attempt == retries:
+                if verbose:
+                    print(f"Vision {span}: giving up after {retries + 1} attempts: {e}")
+                return None
+            delay = retry_delay(attempt, backoff)
+            if verbose:
+                print(f"Vision {span}: {e}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    return chunk_reply(resp, pages, verbose=verbose, stats=stats)
+
+
+class MemoryBackend:
+    """In-process LRU store for ``VisionCache``."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class DiskBackend:
+    """On-disk store for ``VisionCache``, size-bounded LRU via ``ParseCache``.
+
+    ``cache`` is a cache directory, or an open ``ParseCache`` to share with
+    the other stages.
+    """
+
+    def __init__(self, cache: Union[str, ParseCache], max_bytes: int = 1 << 30):
+        self.cache = cache if isinstance(cache, ParseCache) else ParseCache(cache, max_bytes=max_bytes)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(f"vision-reply/{key}")
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.put(f"vision-reply/{key}", value)
+
+
+# Requests in flight across all VisionCache instances in this process, by key
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+class VisionCache:
+    """Memoizes refined page windows and coalesces identical concurrent requests.
+
+    Keys cover the model, the prompt and the canonical JSON of the normalized
+    window (see ``normalize_window``), so the same pages sent again (a re-parse,
+    a concurrent parse, or boilerplate repeated elsewhere in this or another
+    document) cost one model call. ``backend`` is any object with
+    ``get(key)`` and ``set(key, value)``; entries older than ``ttl`` seconds are
+    ignored. Failed windows are not stored.
+    """
+
+    def __init__(self, backend=None, ttl: Optional[float] = None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.stats: Counter = Counter()
+
+    def key(self, model: str, pages: List[Dict[str, Any]]) -> str:
+        payload = json.dumps({"model": model, "prompt": PROMPT, "pages": pages}, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self.backend.get(key)
+        if not isinstance(entry, dict) or "value" not in entry:
+            return None
+        if self.ttl is not None and time.time() - entry.get("at", 0) > self.ttl:
+            return None
+        return entry["value"]
+
+    def get_or_call(self, key: str, fn: Callable[[], Optional[Any]]) -> Tuple[Optional[Any], str]:
+        """Return ``(value, status)`` where status is "hit", "coalesced" or "miss"."""
+        value = self._lookup(key)
+        if value is not None:
+            self.stats["hit"] += 1
+            return value, "hit"
+        with _inflight_lock:
+            fut = _inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = _inflight[key] = Future()
+        if not owner:
+            self.stats["coalesced"] += 1
+            return fut.result(), "coalesced"
+        self.stats["miss"] += 1
+        try:
+            value = fn()
+            if value is not None:
+                self.backend.set(key, {"at": time.time(), "value": value})
+            fut.set_result(value)
+            return value, "miss"
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+    async def get_or_call_async(self, key: str, fn: Callable[[], Awaitable[Optional[Any]]]) -> Tuple[Optional[Any], str]:
+        """``get_or_call`` for a coroutine function; coalesces with sync and async callers alike."""
+        value = self._lookup(key)
+        if value is not None:
+            self.stats["hit"] += 1
+            return value, "hit"
+        with _inflight_lock:
+            fut = _inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = _inflight[key] = Future()
+        if not owner:
+            self.stats["coalesced"] += 1
+            return await asyncio.wrap_future(fut), "coalesced"
+        self.stats["miss"] += 1
+        try:
+            value = await fn()
+            if value is not None:
+                self.backend.set(key, {"at": time.time(), "value": value})
+            fut.set_result(value)
+            return value, "miss"
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+
+# Shared by refine_with_vision calls that don't pass their own cache
+default_cache = VisionCache()
+
+
+def refine_with_vision(
+    doc: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    verbose: bool = False,
+    client=None,
+    max_chunk_tokens: int = 8000,
+    concurrency: int = 4,
+    retries: int = 3,
+    section_refs: bool = False,
+    cache: Optional[VisionCache] = None,
+    stats: Optional[ParseStats] = None,
+) -> Dict[str, Any]:
+    """Refine a parsed document with a chat model, one page window at a time.
+
+    Pages are split into windows under ``max_chunk_tokens`` and sent concurrently
+    (at most ``concurrency`` requests in flight). Windows whose call fails or whose
+    reply can't be used keep their original pages, and ``doc`` itself is returned
+    if no window was refined. The sections tree is rebuilt from the merged pages. ``client`` can be any object with the OpenAI
+    ``chat.completions.create`` interface; by default one is made with ``make_client``.
+    Windows go through ``cache`` (default: the in-process ``default_cache``), so
+    repeated or concurrent identical windows make one call. ``stats`` receives
+    call and token counts and per-window cache outcomes.
+    """
+    if client is None:
+        client = make_client()
+    if cache is None:
+        cache = default_cache
+
+    pages = doc.get("pages", [])
+    chunks = chunk_pages(pages, max_tokens=max_chunk_tokens)
+    if verbose:
+        print(f"Sending {len(pages)} pages to vision model {model} in {len(chunks)} chunks")
+
+    def run(chunk: List[Dict[str, Any]]) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        window = normalize_window(chunk)
+        refined, status = cache.get_or_call(cache.key(model, window), lambda: refine_chunk(client, window, model=model, retries=retries, verbose=verbose, stats=stats))
+        return (restore_window(chunk, refined) if refined is not None else None), status
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        outcomes = list(pool.map(run, chunks))
+    return merge_windows(doc, chunks, outcomes, verbose=verbose, section_refs=section_refs, stats=stats)
+
+
+async def refine_with_vision_async(
+    doc: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    verbose: bool = False,
+    client=None,
+    max_chunk_tokens: int = 8000,
+    concurrency: int = 4,
+    retries: int = 3,
+    section_refs: bool = False,
+    cache: Optional[VisionCache] = None,
+    stats: Optional[ParseStats] = None,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> Dict[str, Any]:
+    """``refine_with_vision`` with an async client (default: ``make_async_client``).
+
+    At most ``concurrency`` windows of this document are in flight; ``limit`` is
+    an optional semaphore shared with other documents to cap requests overall.
+    """
+    if client is None:
+        client = make_async_client()
+    if cache is None:
+        cache = default_cache
+
+    pages = doc.get("pages", [])
+    chunks = chunk_pages(pages, max_tokens=max_chunk_tokens)
+    if verbose:
+        print(f"Sending {len(pages)} pages to vision model {model} in {len(chunks)} chunks")
+    local = asyncio.Semaphore(max(1, concurrency))
+
+    async def call(chunk: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        async with local:
+            if limit is None:
+                return await refine_chunk_async(client, chunk, model=model, retries=retries, verbose=verbose, stats=stats)
+            async with limit:
+                return await refine_chunk_async(client, chunk, model=model, retries=retries, verbose=verbose, stats=stats)
+
+    async def run(chunk: List[Dict[str, Any]]) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        window = normalize_window(chunk)
+        refined, status = await cache.get_or_call_async(cache.key(model, window), lambda: call(window))
+        return (restore_window(chunk, refined) if refined is not None else None), status
+
+    outcomes = await asyncio.gather(*(run(c) for c in chunks))
+    return merge_windows(doc, chunks, outcomes, verbose=verbose, section_refs=section_refs, stats=stats)
+
+
+def merge_windows(doc: Dict[str, Any], chunks: List[List[Dict[str, Any]]], outcomes: List[Tuple[Optional[List[Dict[str, Any]]], str]], verbose: bool = False, section_refs: bool = False, stats: Optional[ParseStats] = None) -> Dict[str, Any]:
+    """Put refined windows back together; unrefined windows keep their original pages."""
+    results = [r for r, _ in outcomes]
+
+    done = sum(r is not None for r in results)
+    status = Counter(st for _, st in outcomes)
+    if stats is not None:
+        for st in ("hit", "miss", "coalesced"):
+            stats.count(f"vision_cache_{st}", status[st])
+    if verbose:
+        print(f"Vision refined {done}/{len(chunks)} chunks (cache: {status['hit']} hits, {status['miss']} misses, {status['coalesced']} coalesced)")
+    if not done:
         return doc
+
+    refined_pages: List[Dict[str, Any]] = []
+    for chunk, refined in zip(chunks, results):
+        refined_pages.extend(refined if refined is not None else chunk)
+
+    meta = doc.get("meta") or {}
+    return {**doc, "pages": refined_pages, "sections": build_sections(refined_pages, meta.get("toc") or [], refs=section_refs)}
@@ -0,0 +1,62 @@
+import json
+import threading
+
+import pytest
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+
+
+class _Response:
+    def __init__(self, content):
+        self.choices = [_Choice(content)]
+        self.usage = None
+
+
+class StubVisionClient:
+    """Offline OpenAI-style client: replies with ``reply(pages)`` for the window it is sent.
+
+    The default reply gives every image alt text and turns the first paragraph of
+    each page into a level 1 heading. The first ``failures`` calls raise.
+    """
+
+    def __init__(self, reply=None, failures=0):
+        self.chat = self
+        self.completions = self
+        self.reply = reply or self.default_reply
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_reply(pages):
+        out = []
+        for page in pages:
+            blocks = [dict(b) for b in page.get("blocks", [])]
+            for b in blocks[:1]:
+                b.update(type="heading", level=1)
+            images = [{**img, "alt": "a picture"} for img in page.get("images", [])]
+            out.append({**page, "blocks": blocks, "images": images})
+        return {"pages": out}
+
+    def create(self, model, messages, temperature=None):
+        pages = json.loads(messages[-1]["content"])["pages"]
+        with self._lock:
+            self.calls.append(pages)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("rate limited")
+        reply = self.reply(pages)
+        return _Response(reply if isinstance(reply, str) else json.dumps(reply))
+
+
+@pytest.fixture
+def stub_client():
+    return StubVisionClient
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from pdfparser import AsyncLimits, parse_pdf, parse_pdf_async
+
+
+def make_pdf():
+    doc = fitz.open()
+    for n in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Chapter {n + 1}", fontsize=18)
+        for k in range(10):
+            page.insert_text((72, 110 + 14 * k), f"Body line {k} of page {n + 1}.", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def mapped_segments(pid):
+    with open(f"/proc/{pid}/maps") as f:
+        return [line for line in f if "/psm_" in line]
+
+
+def test_async_bytes_match_parse_pdf():
+    data = make_pdf()
+    limits = AsyncLimits(processes=2)
+    try:
+        result = asyncio.run(parse_pdf_async(data, ocr_mode="never", limits=limits))
+    finally:
+        limits.close()
+    assert result == parse_pdf(data, ocr_mode="never")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc")
+def test_workers_release_shared_memory():
+    data = make_pdf()
+    limits = AsyncLimits(processes=2)
+
+    async def run():
+        for _ in range(3):
+            await parse_pdf_async(data, ocr_mode="never", limits=limits)
+
+    try:
+        asyncio.run(run())
+        assert all(not mapped_segments(pid) for pid in limits._procs._processes)
+    finally:
+        limits.close()
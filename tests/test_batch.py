@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+import signal
+
+import pytest
+
+from pdfparser import batch
+
+
+def fake_parse(path, **options):
+    if "crash" in path:
+        os.kill(os.getpid(), signal.SIGKILL)
+    if "bad" in path:
+        raise ValueError("not a PDF")
+    return {"input": path}
+
+
+def test_serial_failures_are_isolated(monkeypatch):
+    monkeypatch.setattr(batch, "parse_pdf", fake_parse)
+    results = {r.input: r for r in batch.iter_batch(["a.pdf", "bad.pdf", "b.pdf"])}
+    assert results["a.pdf"].ok and results["b.pdf"].result == {"input": "b.pdf"}
+    assert not results["bad.pdf"].ok and "not a PDF" in results["bad.pdf"].error
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the stub parser reaches workers through fork")
+def test_worker_crash_fails_only_that_input(monkeypatch):
+    monkeypatch.setattr(batch, "parse_pdf", fake_parse)
+    paths = [f"doc{n}.pdf" for n in range(6)] + ["crash.pdf", "bad.pdf"] + [f"more{n}.pdf" for n in range(4)]
+    results = list(batch.iter_batch(paths, jobs=3))
+    assert sorted(r.input for r in results) == sorted(paths)
+    failed = {r.input: r.error for r in results if not r.ok}
+    assert set(failed) == {"crash.pdf", "bad.pdf"}
+    assert "Worker process died" in failed["crash.pdf"]
@@ -0,0 +1,59 @@
+import os
+
+from pdfparser.cache import ParseCache
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    key = cache.key("ocr", "abc", page=1)
+    assert cache.get(key) is None
+    cache.put(key, {"blocks": [1, 2]})
+    assert cache.get(key) == {"blocks": [1, 2]}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_size_is_tracked_without_walking(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), max_bytes=1 << 20)
+    walks = []
+    monkeypatch.setattr(cache, "evict", lambda: walks.append(1))
+    key = cache.key("ocr", "abc", page=1)
+    cache.put(key, "x" * 100)
+    cache.put(key, "x" * 10)  # overwrite replaces the old size
+    cache.put(cache.key("ocr", "abc", page=2), "y" * 50)
+    assert walks == []
+    assert cache.size == sum(p.stat().st_size for p in tmp_path.rglob("*.json"))
+    assert ParseCache(str(tmp_path)).size == cache.size
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=250)
+    keys = [cache.key("ocr", "abc", page=n) for n in range(3)]
+    for n, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        path = cache._path(key)
+        os.utime(path, (n, n))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is not None and cache.get(keys[2]) is not None
+    assert cache.size <= 250
+
+
+def test_open_reads_stored_size_without_walking(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    cache.put(cache.key("ocr", "abc", page=1), "x" * 100)
+
+    def no_walk(self):
+        raise AssertionError("walked the cache directory")
+
+    monkeypatch.setattr(ParseCache, "_entries", no_walk)
+    reopened = ParseCache(str(tmp_path))
+    assert reopened.size == cache.size
+    reopened.put(reopened.key("ocr", "abc", page=2), "y" * 50)
+    assert ParseCache(str(tmp_path)).size == reopened.size
+
+
+def test_writes_from_another_instance_count(tmp_path):
+    a = ParseCache(str(tmp_path), max_bytes=1 << 20)
+    b = ParseCache(str(tmp_path), max_bytes=1 << 20)
+    a.put(a.key("ocr", "abc", page=1), "x" * 100)
+    b.put(b.key("ocr", "abc", page=2), "y" * 100)
+    assert b.size == sum(p.stat().st_size for p in tmp_path.rglob("*.json"))
@@ -0,0 +1,16 @@
+import sys
+
+import pytest
+
+from pdfparser import cli
+
+
+@pytest.mark.parametrize("extra", [[], ["--out-dir", "out"]])
+def test_no_matching_inputs(tmp_path, monkeypatch, extra):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "empty").mkdir()
+    for pattern in [str(tmp_path / "*.pdf"), str(tmp_path / "empty")]:
+        monkeypatch.setattr(sys, "argv", ["pdfparser", pattern, *extra])
+        with pytest.raises(SystemExit) as exc:
+            cli.main()
+        assert str(exc.value).startswith("No input PDFs matched")
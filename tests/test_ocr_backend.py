@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from PIL import Image
+
+from pdfparser import ocr
+from pdfparser.ocr import OcrBackend, TesserocrBackend, get_backend, ocr_blocks, parse_tsv
+
+# Rows as tesseract writes them: page, block, paragraph, line and word levels
+ROWS = (
+    "1\t1\t0\t0\t0\t0\t0\t0\t1000\t1400\t-1\t\n"
+    "2\t1\t1\t0\t0\t0\t100\t100\t600\t150\t-1\t\n"
+    "3\t1\t1\t1\t0\t0\t100\t100\t600\t150\t-1\t\n"
+    "4\t1\t1\t1\t1\t0\t100\t100\t600\t50\t-1\t\n"
+    "5\t1\t1\t1\t1\t1\t100\t100\t250\t50\t96.5\tHello\n"
+    "5\t1\t1\t1\t1\t2\t400\t100\t300\t50\t91\tworld\n"
+    "4\t1\t1\t1\t2\t0\t100\t200\t400\t50\t-1\t\n"
+    "5\t1\t1\t1\t2\t1\t100\t200\t400\t50\t88\tagain\n"
+    "5\t1\t1\t1\t2\t2\t520\t200\t10\t50\t0\t \n"
+    "5\t1\t2\t1\t1\t1\t100\t600\t300\t30\t90\tsecond\n"
+)
+TSV = ocr.TSV_HEADER + "\n" + ROWS
+
+
+def test_parse_tsv_columns():
+    data = parse_tsv(TSV)
+    assert list(data) == ocr.TSV_HEADER.split("\t")
+    assert data["level"][:5] == [1, 2, 3, 4, 5]
+    assert data["text"][4:6] == ["Hello", "world"]
+    assert data["conf"][4] == 96.5 and data["conf"][0] == -1.0
+    assert all(len(col) == 10 for col in data.values())
+    assert parse_tsv("") == {}
+
+
+def test_ocr_blocks_groups_lines_and_paragraphs():
+    blocks = ocr_blocks(parse_tsv(TSV), scale=0.5, origin=(10.0, 20.0))
+    assert [b.text for b in blocks] == ["Hello world\nagain", "second"]
+    first = blocks[0]
+    assert first.bbox == [60.0, 70.0, 360.0, 145.0]
+    assert list(first.sizes) == [25.0, 25.0]
+    assert list(blocks[1].sizes) == [15.0]
+
+
+class FakeApi:
+    created = 0
+
+    def __init__(self, **kwargs):
+        FakeApi.created += 1
+        self.kwargs = kwargs
+        self.image = None
+
+    def SetImage(self, img):
+        self.image = img
+
+    def GetTSVText(self, page):
+        assert self.image is not None
+        return ROWS
+
+    def Clear(self):
+        self.image = None
+
+    def End(self):
+        pass
+
+
+class FakeTesserocr:
+    PyTessBaseAPI = FakeApi
+
+
+def test_tesserocr_backend_reuses_engines(monkeypatch):
+    monkeypatch.setattr(ocr, "tesserocr", FakeTesserocr)
+    FakeApi.created = 0
+    backend = TesserocrBackend(lang="deu")
+    img = Image.new("L", (100, 140), 255)
+    assert backend.image_to_data(img) == parse_tsv(TSV)
+    threads = [threading.Thread(target=backend.image_to_data, args=(img,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for _ in range(3):
+        backend.image_to_data(img)
+    assert 1 <= FakeApi.created <= 4
+    assert backend._idle[0].kwargs == {"lang": "deu"}
+    backend.close()
+    assert backend._idle == []
+
+
+def test_get_backend(monkeypatch):
+    monkeypatch.setattr(ocr, "_backends", {})
+    monkeypatch.setattr(ocr, "tesserocr", None)
+    assert get_backend().name == "pytesseract"
+    assert get_backend("auto") is get_backend("pytesseract")
+    assert get_backend("cli").name == "cli"
+    with pytest.raises(RuntimeError):
+        get_backend("tesserocr")
+    with pytest.raises(ValueError):
+        get_backend("nope")
+    monkeypatch.setattr(ocr, "tesserocr", FakeTesserocr)
+    assert get_backend("auto").name == "tesserocr"
+
+
+def test_backend_instances_pass_through():
+    class Custom(OcrBackend):
+        def image_to_data(self, img):
+            return {}
+
+    custom = Custom()
+    assert get_backend(custom) is custom
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Broken(OcrBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Broken()
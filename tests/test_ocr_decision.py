@@ -0,0 +1,84 @@
+from pdfparser.ocr import MIN_GLYPHS, choose_dpi, classify_page, ocr_clips, ocr_decision
+
+W, H = 612, 792
+FULL = [0, 0, W, H]
+
+
+def text_block(text, bbox, size=10.0):
+    return {"type": "text", "text": text, "bbox": bbox, "spans": [{"text": text, "size": size, "flags": 0}]}
+
+
+def page(blocks=(), images=()):
+    return {"number": 1, "width": W, "height": H, "raw_blocks": list(blocks), "images": list(images)}
+
+
+def body(glyphs):
+    words = ["abcde"] * (glyphs // 5)
+    return text_block(" ".join(words), [72, 72, 540, 720])
+
+
+def test_no_text():
+    decision = classify_page(page())
+    assert decision["needed"] and decision["reason"] == "no-text" and decision["glyphs"] == 0
+
+
+def test_stamp_over_full_page_scan():
+    stamp = text_block("Page 1 of 10", [280, 760, 330, 772])
+    decision = classify_page(page([stamp], [{"bbox": FULL, "width": 1275}]))
+    assert decision["needed"] and decision["reason"] == "full-page-image"
+    assert decision["image_coverage"] == 1.0
+
+
+def test_image_dominant():
+    # Two half-page images (neither is a full-page scan) with a caption
+    caption = text_block("Figure 1: two photographs", [72, 770, 300, 782])
+    images = [{"bbox": [0, 0, W, 396]}, {"bbox": [0, 396, W, 760]}]
+    decision = classify_page(page([caption], images))
+    assert decision["needed"] and decision["reason"] == "image-dominant"
+
+
+def test_native_text():
+    decision = classify_page(page([body(1000)]))
+    assert not decision["needed"] and decision["reason"] == "native-text"
+
+
+def test_enough_text_over_a_scan_is_native():
+    decision = classify_page(page([body(MIN_GLYPHS)], [{"bbox": FULL, "width": 1275}]))
+    assert decision["glyphs"] >= MIN_GLYPHS
+    assert decision["reason"] == "native-text"
+
+
+def test_decision_modes():
+    assert ocr_decision(page(), "never") is None
+    forced = ocr_decision(page([body(1000)]), "always")
+    assert forced["needed"] and forced["reason"] == "forced"
+    assert ocr_decision(page(), "if-needed", dpi=200, adaptive_dpi=False)["dpi"] == 200
+
+
+def test_dpi_of_a_150_dpi_scan():
+    scan = {"bbox": FULL, "width": W * 150 // 72}
+    assert choose_dpi(page(images=[scan]), 300) == 150
+    # A finer scan is still capped by the requested maximum
+    assert choose_dpi(page(images=[{"bbox": FULL, "width": W * 600 // 72}]), 300) == 300
+
+
+def test_dpi_of_a_10pt_text_layer():
+    # 32 px glyphs at 10 pt need 32 * 72 / 10 = 230.4 DPI
+    assert choose_dpi(page([body(1000)]), 300) == 230
+    assert choose_dpi(page([text_block("tiny print", [72, 72, 200, 80], size=4.0)]), 300) == 300
+    assert choose_dpi(page([text_block("large print", [72, 72, 400, 140], size=40.0)]), 300) == 150
+
+
+def test_dpi_is_capped_for_oversized_pages():
+    poster = {"number": 1, "width": 2000, "height": 2000, "raw_blocks": [], "images": []}
+    assert choose_dpi(poster, 300) == 108
+
+
+def test_ocr_clips_follow_the_image_list():
+    figure = {"bbox": [72, 400, 540, 700]}
+    native = page([body(2 * MIN_GLYPHS)], [figure])
+    assert ocr_clips(native) == [None]
+    assert ocr_clips(native, regions=True) == [(72, 400, 540, 700)]
+    # Profiles without images leave nothing to recognize, which must not share a cache key
+    assert ocr_clips(page([body(2 * MIN_GLYPHS)]), regions=True) == []
+    assert ocr_clips(page(), regions=True) == [None]
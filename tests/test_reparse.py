@@ -0,0 +1,62 @@
+import fitz  # PyMuPDF
+
+from pdfparser import parse_pdf, reparse_pdf
+from pdfparser.ocr import OcrBackend, parse_tsv
+
+# Two OCR lines: a tall one that looks like a title, and body text below it
+TSV = (
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+    "5\t1\t1\t1\t1\t1\t100\t100\t400\t80\t95\tBig\n"
+    "5\t1\t1\t1\t1\t2\t520\t100\t400\t80\t95\tTitle\n"
+    "5\t1\t2\t1\t1\t1\t100\t300\t200\t30\t95\tbody\n"
+    "5\t1\t2\t1\t1\t2\t320\t300\t200\t30\t95\ttext\n"
+    "5\t1\t2\t1\t1\t3\t540\t300\t200\t30\t95\there\n"
+)
+
+
+class FakeOcr(OcrBackend):
+    name = "fake"
+
+    def image_to_data(self, img):
+        return parse_tsv(TSV)
+
+
+def make_pdf(path):
+    doc = fitz.open()
+    scan = doc.new_page()
+    pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 200, 260), False)
+    pix.clear_with(200)
+    scan.insert_image(scan.rect, pixmap=pix)
+    for n in range(2):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Chapter {n + 1}", fontsize=18)
+        for k in range(20):
+            page.insert_text((72, 110 + 14 * k), f"Body line {k} of page {n + 2}.", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def edit_page(path, index):
+    doc = fitz.open(path)
+    doc[index].draw_rect(fitz.Rect(10, 10, 20, 20), color=(1, 0, 0))
+    doc.saveIncr()
+    doc.close()
+
+
+def assert_reparse_matches(path, index):
+    opts = dict(ocr_mode="if-needed", ocr_backend=FakeOcr())
+    previous = parse_pdf(path, fingerprints=True, **opts)
+    edit_page(path, index)
+    assert reparse_pdf(path, previous, **opts) == parse_pdf(path, fingerprints=True, **opts)
+
+
+def test_reparse_after_scanned_first_page_edit(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path)
+    assert_reparse_matches(path, 0)
+
+
+def test_reparse_after_text_page_edit(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path)
+    assert_reparse_matches(path, 2)
@@ -0,0 +1,36 @@
+import fitz  # PyMuPDF
+
+from pdfparser import iter_parse_pdf, parse_pdf
+
+
+def make_pdf(path, body_pages=3):
+    doc = fitz.open()
+    title = doc.new_page()
+    title.insert_text((72, 200), "A Long Report", fontsize=28)
+    title.insert_text((72, 260), "With a subtitle", fontsize=16)
+    for n in range(body_pages):
+        page = doc.new_page()
+        for k in range(30):
+            page.insert_text((72, 72 + 14 * k), f"Body line {k} on page {n + 2} with some words.", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def test_stream_matches_parse_pdf_on_title_page(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path)
+    full = parse_pdf(path, ocr_mode="never")
+    *pages, trailer = iter_parse_pdf(path, ocr_mode="never")
+    assert [b["level"] for b in pages[0]["blocks"]] == [1, 2]
+    assert pages == full["pages"]
+    assert trailer["sections"] == full["sections"]
+
+
+def test_stream_without_font_pass_levels_settle_after_first_page(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path)
+    full = parse_pdf(path, ocr_mode="never")
+    *pages, trailer = iter_parse_pdf(path, ocr_mode="never", font_pass=False)
+    # Page 1 alone makes the subtitle size look like body text
+    assert [b.get("level") for b in pages[0]["blocks"]] == [1, None]
+    assert pages[1:] == full["pages"][1:]
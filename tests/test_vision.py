@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from pdfparser import vision
+from pdfparser.vision import (
+    MemoryBackend,
+    VisionCache,
+    chunk_pages,
+    estimate_tokens,
+    merge_chunk,
+    parse_json_reply,
+    refine_chunk,
+    refine_with_vision,
+)
+
+
+def page(number, words=20):
+    text = " ".join(f"word{k}" for k in range(words))
+    return {"number": number, "width": 612, "height": 792, "blocks": [{"type": "paragraph", "text": f"Intro {number}", "bbox": [72, 72, 300, 90]}, {"type": "paragraph", "text": text, "bbox": [72, 100, 540, 300]}], "images": [], "links": []}
+
+
+def doc(pages):
+    return {"meta": {"toc": []}, "pages": pages, "sections": []}
+
+
+def cost(p):
+    return estimate_tokens(json.dumps(p, ensure_ascii=False))
+
+
+def test_chunks_stay_under_the_token_budget():
+    pages = [page(n, words=10 * n) for n in range(1, 13)]
+    budget = 3 * cost(pages[5])
+    chunks = chunk_pages(pages, max_tokens=budget)
+    assert [p for c in chunks for p in c] == pages
+    assert len(chunks) > 1
+    for c in chunks:
+        assert len(c) == 1 or sum(cost(p) for p in c) <= budget
+
+
+def test_oversized_page_gets_its_own_window():
+    small, big = page(1), page(2, words=2000)
+    chunks = chunk_pages([small, big, page(3)], max_tokens=cost(small) * 2)
+    assert [[p["number"] for p in c] for c in chunks] == [[1], [2], [3]]
+
+
+def test_merge_chunk_needs_exactly_the_window_pages():
+    window = [page(1), page(2)]
+    refined = {"pages": [{"number": 2, "blocks": []}, {"number": 1, "blocks": []}]}
+    merged = merge_chunk(window, refined)
+    assert [p["number"] for p in merged] == [1, 2] and merged[0]["blocks"] == []
+    assert merged[0]["width"] == 612
+    assert merge_chunk(window, {"pages": [{"number": 1}]}) is None
+    assert merge_chunk(window, {"pages": [{"number": 1}, {"number": 2}, {"number": 3}]}) is None
+    assert merge_chunk(window, {"pages": "nope"}) is None
+    assert merge_chunk(window, []) is None
+
+
+def test_parse_json_reply_strips_code_fences():
+    assert parse_json_reply('```json\n{"pages": []}\n```') == {"pages": []}
+    assert parse_json_reply('{"pages": []}') == {"pages": []}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(vision.time, "sleep", delays.append)
+    return delays
+
+
+def test_retries_with_backoff(stub_client, sleeps):
+    client = stub_client(failures=2)
+    refined = refine_chunk(client, [page(1)], retries=3, backoff=1.0)
+    assert refined is not None and refined[0]["blocks"][0]["type"] == "heading"
+    assert len(client.calls) == 3
+    assert len(sleeps) == 2
+    assert 0.5 <= sleeps[0] <= 1.5 and 1.0 <= sleeps[1] <= 3.0
+
+
+def test_gives_up_after_retries(stub_client, sleeps):
+    client = stub_client(failures=10)
+    assert refine_chunk(client, [page(1)], retries=2) is None
+    assert len(client.calls) == 3 and len(sleeps) == 2
+
+
+def test_unusable_reply_keeps_original_pages(stub_client):
+    original = doc([page(1), page(2)])
+    client = stub_client(reply=lambda pages: {"pages": pages[:1]})
+    assert refine_with_vision(original, client=client, cache=VisionCache(MemoryBackend())) is original
+    client = stub_client(reply=lambda pages: "not json")
+    assert refine_with_vision(original, client=client, cache=VisionCache(MemoryBackend())) is original
+
+
+def test_sections_are_rebuilt_from_refined_pages(stub_client):
+    pages = [page(n, words=200) for n in range(1, 5)]
+    client = stub_client()
+    out = refine_with_vision(doc(pages), client=client, cache=VisionCache(MemoryBackend()), max_chunk_tokens=cost(pages[0]) + 1)
+    assert len(client.calls) == 4
+    assert [p["number"] for p in out["pages"]] == [1, 2, 3, 4]
+    assert [s["title"] for s in out["sections"]] == ["Intro 1", "Intro 2", "Intro 3", "Intro 4"]
+    assert [s["page_start"] for s in out["sections"]] == [1, 2, 3, 4]
+
+
+def test_failed_window_keeps_its_pages(stub_client):
+    pages = [page(n, words=200) for n in range(1, 4)]
+
+    def reply(window):
+        if "Intro 2" in json.dumps(window):
+            return "garbage"
+        return stub_client.default_reply(window)
+
+    out = refine_with_vision(doc(pages), client=stub_client(reply=reply), cache=VisionCache(MemoryBackend()), max_chunk_tokens=cost(pages[0]) + 1)
+    assert out["pages"][1] == pages[1]
+    assert [s["title"] for s in out["sections"]] == ["Intro 1", "Intro 3"]
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from pdfparser.vision import MemoryBackend, VisionCache, normalize_window, refine_with_vision
+
+
+def page(number, text, image_id=None):
+    images = [{"id": image_id, "xref": 10 + number, "path": f"images/{image_id}.png", "bbox": [0, 0, 100, 100], "width": 50, "height": 50}] if image_id else []
+    return {"number": number, "width": 612, "height": 792, "blocks": [{"type": "paragraph", "text": text, "bbox": [72, 72, 300, 90]}], "images": images, "links": []}
+
+
+def doc(pages):
+    return {"meta": {"toc": []}, "pages": pages, "sections": []}
+
+
+def test_normalized_window():
+    window = normalize_window([page(7, "Terms", "img-3"), page(8, "More terms")])
+    assert [p["number"] for p in window] == [1, 2]
+    assert window[0]["images"] == [{"bbox": [0, 0, 100, 100], "width": 50, "height": 50}]
+
+
+def test_same_pages_elsewhere_hit_the_cache(stub_client):
+    client = stub_client()
+    cache = VisionCache(MemoryBackend())
+    first = refine_with_vision(doc([page(1, "Legal notice", "img-1")]), client=client, cache=cache)
+    # Same boilerplate, another document, another position and image id
+    second = refine_with_vision(doc([page(9, "Legal notice", "img-9")]), client=client, cache=cache)
+    assert len(client.calls) == 1
+    assert cache.stats["hit"] == 1
+    assert client.calls[0][0]["number"] == 1 and "id" not in client.calls[0][0]["images"][0]
+    p1, p9 = first["pages"][0], second["pages"][0]
+    assert (p1["number"], p9["number"]) == (1, 9)
+    assert p1["images"][0]["id"] == "img-1" and p9["images"][0]["id"] == "img-9"
+    assert p9["images"][0]["path"] == "images/img-9.png" and p9["images"][0]["alt"] == "a picture"
+    assert p9["blocks"][0]["type"] == "heading"
+
+
+def test_ttl_expires_entries():
+    cache = VisionCache(MemoryBackend(), ttl=60)
+    key = cache.key("m", [page(1, "x")])
+    cache.backend.set(key, {"at": time.time() - 120, "value": ["old"]})
+    value, status = cache.get_or_call(key, lambda: ["new"])
+    assert (value, status) == (["new"], "miss")
+    assert cache.get_or_call(key, lambda: ["newer"]) == (["new"], "hit")
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache = VisionCache(MemoryBackend())
+    key = cache.key("m", [page(1, "x")])
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["refined"]
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_call(key, slow)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get_or_call(key, slow)))
+    waiter.start()
+    deadline = time.time() + 5
+    while not cache.stats["coalesced"] and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    owner.join()
+    waiter.join()
+    assert calls == [1]
+    assert sorted(status for _, status in results) == ["coalesced", "miss"]
+    assert all(value == ["refined"] for value, _ in results)